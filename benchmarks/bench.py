@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Benchmarks of the compute and render paths of venn, with JSON output and baseline comparison
+
+    python benchmarks/bench.py --quick -o results.json
+    python benchmarks/bench.py --baseline baseline.json --tolerance .25
+
+Every case records its best wall time over --repeat runs (seconds) and the peak traced
+memory of one extra run (bytes); exits with status 1 if any case is slower or bigger than
+the baseline by more than the tolerance.
+"""
+
+from argparse import ArgumentParser
+from subprocess import check_output
+from tempfile import TemporaryDirectory
+from time import perf_counter, strftime
+from sys import executable, path as sys_path, stderr, version as python_version
+from platform import platform
+import tracemalloc
+import json
+import os
+
+sys_path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy
+import matplotlib
+from venn._compute import generate_logics, generate_petal_labels
+from venn._profile import Profile, profiling
+from venn._cli import get_peak_rss
+
+N_SETS = (2, 3, 4, 5, 6)
+SIZES = (10**3, 10**4, 10**5, 10**6, 10**7)
+QUICK_SIZES = (10**3, 10**4, 10**5)
+OVERLAPS = (.1, .5, .9)
+ENGINES = ("python", "numpy")
+PYTHON_MAX_SIZE = 10**6
+
+def make_datasets(n_sets, size, overlap, seed=0):
+    """n_sets integer arrays of about `size` elements; a fraction `overlap` of each is shared by all sets"""
+    rng = numpy.random.default_rng(seed)
+    n_shared = int(size * overlap)
+    shared = numpy.arange(n_shared)
+    return [
+        numpy.unique(numpy.concatenate([
+            shared, rng.integers(n_shared, n_shared + size * n_sets, size - n_shared),
+        ]))
+        for _ in range(n_sets)
+    ]
+
+def measure(function, repeat):
+    """Best wall time over repeat calls, and peak memory traced during one more call"""
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"time": min(times), "peak": peak}
+
+def measure_stages(function, repeat):
+    """Best wall time of every profiled stage over repeat calls, and its peak memory in one more call"""
+    results = {}
+    for _ in range(repeat):
+        with profiling(Profile(trace_memory=False)) as profile:
+            function()
+        for stats in profile.stages:
+            best = results.setdefault(stats.name, {"time": stats.wall_time})
+            best["time"] = min(best["time"], stats.wall_time)
+    with profiling(Profile()) as profile:
+        function()
+    for stats in profile.stages:
+        results[stats.name]["peak"] = stats.peak
+    return results
+
+def bench_import(repeat):
+    """Best wall time of `import venn` in a fresh interpreter"""
+    code = "import time; t = time.perf_counter(); import venn; print(time.perf_counter() - t)"
+    times = [
+        float(check_output([executable, "-c", code], cwd=sys_path[0]).decode())
+        for _ in range(repeat)
+    ]
+    return {"import venn": {"time": min(times)}}
+
+def bench_logics(repeat):
+    results = {}
+    for n_sets in N_SETS:
+        case = measure(lambda: [list(generate_logics(n_sets)) for _ in range(1000)], repeat)
+        results["generate_logics[n={}]x1000".format(n_sets)] = case
+    return results
+
+def bench_petal_labels(sizes, repeat, outdir):
+    """Partition and petal file writing of generate_petal_labels, per engine, n_sets, size and overlap"""
+    results = {}
+    for engine in ENGINES:
+        for n_sets in N_SETS:
+            for size in sizes:
+                if (engine == "python") and (size > PYTHON_MAX_SIZE):
+                    continue
+                for overlap in OVERLAPS:
+                    datasets = make_datasets(n_sets, size, overlap)
+                    if engine == "python":
+                        datasets = [set(dataset.tolist()) for dataset in datasets]
+                    stages = measure_stages(
+                        lambda: generate_petal_labels(datasets, outdir=outdir, engine=engine),
+                        repeat,
+                    )
+                    for name, case in stages.items():
+                        key = "generate_petal_labels[{},n={},size={:.0e},overlap={}].{}".format(
+                            engine, n_sets, size, overlap, name,
+                        )
+                        results[key] = case
+                    print(".", end="", file=stderr, flush=True)
+    print(file=stderr)
+    return results
+
+def bench_render(repeat, outdir):
+    """Figure construction and every export format of venn() for 2-6 sets, and of pseudovenn()"""
+    from venn._venn import venn, pseudovenn, FIGURE_FORMATS
+    from matplotlib.pyplot import close
+    results = {}
+    cases = [("draw_venn", n_sets, venn) for n_sets in N_SETS] + [("draw_pseudovenn6", 6, pseudovenn)]
+    for name, n_sets, function in cases:
+        data = {
+            "ABCDEF"[i]: set(dataset.tolist())
+            for i, dataset in enumerate(make_datasets(n_sets, 1000, .5))
+        }
+        def render():
+            ax, _ = function(data, outdir=outdir, formats=FIGURE_FORMATS)
+            close(ax.figure)
+        for stage_name, case in measure_stages(render, repeat).items():
+            if stage_name in {"partition", "write_petals", "write_sets"}:
+                continue
+            results["{}[n={}].{}".format(name, n_sets, stage_name)] = case
+    return results
+
+def get_meta():
+    return {
+        "date": strftime("%Y-%m-%d %H:%M:%S"), "platform": platform(),
+        "python": python_version.split()[0], "numpy": numpy.__version__,
+        "matplotlib": matplotlib.__version__, "cpu_count": os.cpu_count(),
+    }
+
+def compare(results, baseline, tolerance, min_time=1e-3):
+    """Print cases that differ from baseline by more than tolerance; return names of regressed cases"""
+    # timings below min_time seconds are dominated by noise and only compared if one side exceeds it:
+    regressions = []
+    for key in sorted(set(results) & set(baseline)):
+        for metric in "time", "peak":
+            new, old = results[key].get(metric), baseline[key].get(metric)
+            if (new is None) or (not old):
+                continue
+            elif (metric == "time") and (max(new, old) < min_time):
+                continue
+            ratio = new / old
+            if ratio > 1 + tolerance:
+                regressions.append("{} {}".format(key, metric))
+                print("REGRESSED  {:>7.2f}x  {} {}".format(ratio, key, metric), file=stderr)
+            elif ratio < 1 - tolerance:
+                print("improved   {:>7.2f}x  {} {}".format(ratio, key, metric), file=stderr)
+    n_missing = len(set(baseline) - set(results))
+    if n_missing:
+        print("{} baseline cases were not run".format(n_missing), file=stderr)
+    return regressions
+
+def get_parser():
+    parser = ArgumentParser(description="Benchmark compute and render paths of venn")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", help="compare against results stored in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=.2, help="allowed relative slowdown or memory growth (default: %(default)s)")
+    parser.add_argument("--min-time", type=float, default=1e-3, help="do not compare timings below this many seconds (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default: %(default)s)")
+    parser.add_argument("--quick", action="store_true", help="only use input sizes up to 10^5")
+    parser.add_argument("--sizes", help="comma-separated input sizes, e.g. 1e3,1e6 (overrides --quick)")
+    parser.add_argument("--skip", default="", help="comma-separated groups to skip: import,logics,petals,render")
+    return parser
+
+def main():
+    args = get_parser().parse_args()
+    if args.sizes:
+        sizes = [int(float(size)) for size in args.sizes.split(",")]
+    else:
+        sizes = QUICK_SIZES if args.quick else SIZES
+    skip = set(args.skip.split(","))
+    results = {}
+    with TemporaryDirectory() as outdir:
+        if "import" not in skip:
+            results.update(bench_import(args.repeat))
+        if "logics" not in skip:
+            results.update(bench_logics(args.repeat))
+        if "petals" not in skip:
+            results.update(bench_petal_labels(sizes, args.repeat, outdir))
+        if "render" not in skip:
+            results.update(bench_render(args.repeat, outdir))
+    report = {"meta": get_meta(), "peak_rss": get_peak_rss(), "results": results}
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=1)
+    else:
+        print(json.dumps(report, indent=1))
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)["results"]
+        if compare(results, baseline, args.tolerance, args.min_time):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -35,5 +35,6 @@ if __name__ == "__main__":
             "Intended Audience :: Science/Research",
             "Topic :: Scientific/Engineering :: Visualization"
         ],
-        install_requires = ["matplotlib"]
+        install_requires = ["matplotlib"],
+        entry_points = {"console_scripts": ["pyvenn = venn._cli:main"]}
     )
@@ -9,6 +9,20 @@
 # @ Last Modified: 2021-06-01, 23:51:03
 #############################################
 
+# %%
+# `import venn` must stay fast and must not pull in matplotlib, numpy, or process pool and zip machinery:
+from subprocess import check_output
+from sys import executable
+IMPORT_TIME_TARGET = 0.08  # seconds
+HEAVY_MODULES = {"matplotlib", "numpy", "asyncio", "multiprocessing", "concurrent", "zipfile", "tracemalloc"}
+import_check = check_output([executable, "-c", (
+    "import sys, time; t = time.perf_counter(); import venn; "
+    "print(time.perf_counter() - t); "
+    "print(','.join(sorted({m.split('.')[0] for m in sys.modules} & %r)) or '-')" % HEAVY_MODULES
+)]).decode().split()
+assert float(import_check[0]) < IMPORT_TIME_TARGET, import_check
+assert import_check[1] == "-", "`import venn` loaded " + import_check[1]
+
 # %%
 from importlib import reload
 from matplotlib import pyplot as plt
@@ -61,4 +75,321 @@ ax, outname = venn.venn({"A-set": {1, 2, 3},
      )
 # plt.savefig(f'{outname}venn.pdf', dpi=200, bbox_inches='tight')
 # plt.savefig(f'{outname}venn.png', dpi=200, bbox_inches='tight')
-# plt.savefig(f'{outname}venn.svg', dpi=200, bbox_inches='tight')
\ No newline at end of file
+# plt.savefig(f'{outname}venn.svg', dpi=200, bbox_inches='tight')
+# %%
+# petal labels and files must match the original set-algebra algorithm byte for byte:
+import os
+from random import Random
+from tempfile import TemporaryDirectory
+from filecmp import cmp
+from venn._compute import generate_logics, generate_petal_labels
+
+def reference_petal_labels(datasets, fmt, outname, outdir):
+    """generate_petal_labels() before single-pass partitioning, for comparison"""
+    n_sets = len(datasets)
+    dataset_union = set.union(*datasets)
+    petal_labels, datas = {}, {}
+    for logic in generate_logics(n_sets):
+        included_sets = [datasets[i] for i in range(n_sets) if logic[i] == "1"]
+        excluded_sets = [datasets[i] for i in range(n_sets) if logic[i] == "0"]
+        petal_set = (dataset_union & set.intersection(*included_sets)) - set.union(set(), *excluded_sets)
+        petal_labels[logic] = fmt.format(
+            logic=logic, size=len(petal_set),
+            percentage=(100*len(petal_set)/max(len(dataset_union), 1))
+        )
+        datas[(logic, ''.join([y for x, y in zip(logic, "ABCDEF") if int(x)]))] = petal_set
+    names = dict(zip(sorted([x[1] for x in sorted(datas, key=lambda x:x[1])], key=len), range(1, len(datas)+1)))
+    names_out = {}
+    for logic, name in datas:
+        names_out[logic] = "%s%02d%s.txt" % (outname, names[name], name)
+        with open(os.path.join(outdir, names_out[logic]), "w") as handle:
+            print(*sorted(datas[(logic, name)]), sep="\n", end="", file=handle)
+    return petal_labels, names_out
+
+def same_files(outdir_a, outdir_b, filenames):
+    return all(cmp(os.path.join(outdir_a, f), os.path.join(outdir_b, f), shallow=False) for f in filenames)
+
+rng = Random(0)
+for n_sets in range(2, 7):
+    datasets = [set(rng.sample(range(300), rng.randrange(0, 150))) for _ in range(n_sets)]
+    with TemporaryDirectory() as old_dir, TemporaryDirectory() as new_dir:
+        fmt = "{logic}: {size} ({percentage:.1f}%)"
+        expected = reference_petal_labels(datasets, fmt, "out", old_dir)
+        assert generate_petal_labels(datasets, fmt=fmt, outdir=new_dir) == expected
+        assert same_files(old_dir, new_dir, expected[1].values())
+
+# %%
+# the NumPy engine must give the same labels and files as the Python engine:
+from numpy import array
+for n_sets in range(2, 7):
+    datasets = [set(rng.sample(range(300), rng.randrange(0, 150))) for _ in range(n_sets)]
+    with TemporaryDirectory() as python_dir, TemporaryDirectory() as numpy_dir:
+        fmt = "{logic}: {size} ({percentage:.1f}%)"
+        expected = generate_petal_labels(datasets, fmt=fmt, outdir=python_dir, engine="python")
+        assert generate_petal_labels([array(sorted(d), dtype=int) for d in datasets], fmt=fmt, outdir=numpy_dir, engine="numpy") == expected
+        assert same_files(python_dir, numpy_dir, expected[1].values())
+
+# %%
+# lazy results: petals by logic, letters or mask, and export of selected petals only:
+data = {"A": {1, 2, 3, 4}, "B": {3, 4, 5}, "C": {4, 5, 6, 7}}
+result = venn.venn(data, lazy=True, formats=("svg",), outdir="out-test")
+plt.close(result.ax.figure)
+assert result.petal("110") == result["AB"] == result[0b110] == {3}
+assert result["ABC"] == {4} and result["A"] == {1, 2} and result["C"] == {6, 7}
+assert result.petal_counts[0b111] == 1 and result.dataset_sizes == [4, 3, 4]
+with TemporaryDirectory() as tmp:
+    result.export(tmp, logics={"110", "001"}, sets=False)
+    names_out = result.names_out()
+    assert sorted(os.listdir(tmp)) == sorted([names_out["110"], names_out["001"]])
+    with open(os.path.join(tmp, names_out["001"])) as handle:
+        assert handle.read() == "6\n7"
+
+# %%
+# html embeds the svg, so the svg is written with it even if not requested:
+with TemporaryDirectory() as tmp:
+    ax, outname = venn.venn({"A": {1, 2}, "B": {2, 3}}, outdir=tmp, formats=("html",), counts_only=True)
+    plt.close(ax.figure)
+    assert sorted(os.listdir(tmp)) == [outname + "venn.html", outname + "venn.svg"]
+
+# %%
+# svg colors: every matplotlib color spec ends up as valid css, without matplotlib for plain names:
+from venn import venn_svg
+from venn._svg import generate_svg_colors, css_color
+colors = generate_svg_colors(cmap=["r", "#123456", "navy", "C0", "tab:orange", "0.5"], n_colors=6)
+assert [css_color(color) for color, _ in colors[:3]] == ["#ff0000", "#123456", "navy"]
+assert all(not isinstance(color, str) for color, _ in colors[3:])
+assert css_color(colors[4][0]) == "rgb(255,127,14)"
+assert "C0" not in venn_svg({"A": {1}, "B": {2}}, cmap=["C0", "C1"])
+
+# %%
+# batch: a failing job comes back as an error without stopping the batch or leaving figures open:
+from venn import venn_batch
+plt.close("all")
+pool = {"A": {1, 2, 3}, "B": {2, 3, 4}, "C": {3, 4, 5}}
+with TemporaryDirectory() as tmp:
+    results = venn_batch(pool, combinations=[("A", "B"), ("A", "Z"), ("B", "C")], workers=1, outdir=tmp, formats=("svg",))
+    assert [result.error is None for result in results] == [True, False, True]
+    assert "KeyError" in results[1].error
+    assert results[0].petal_counts == [0, 1, 1, 2] and results[2].petal_counts == [0, 1, 1, 2]
+    assert sorted(os.listdir(tmp)) == ["A__vs__B", "B__vs__C"]
+    results = venn_batch([{"A": {1}, "B": {2}}], workers=1, outdir=tmp, formats=("bogus",))
+    assert results[0].error is not None
+    assert plt.get_fignums() == []
+
+# %%
+# incremental updates keep petal counts equal to recounting the changed sets:
+from venn import IncrementalVenn
+from venn._compute import compute_petal_counts
+data = {"A": set(range(0, 50)), "B": set(range(30, 80)), "C": set(range(60, 100))}
+incremental = IncrementalVenn.from_datasets(data)
+incremental.add("A", range(45, 70)).remove("B", range(30, 40)).remove("C", [99, 1000]).add("C", [1000])
+data["A"] |= set(range(45, 70))
+data["B"] -= set(range(30, 40))
+data["C"] = (data["C"] - {99}) | {1000}
+assert incremental.petal_counts == compute_petal_counts(data.values())
+assert incremental.dataset_sizes == [len(dataset) for dataset in data.values()]
+with TemporaryDirectory() as tmp:
+    incremental.render(tmp, formats=("svg",))
+    incremental.add("B", [1000]).render(tmp, formats=("svg",))
+    assert os.listdir(tmp) == ["result_venn.svg"]
+    data["B"].add(1000)
+    assert incremental.petal_labels() == generate_petal_labels(data.values(), outdir=tmp)[0]
+
+# %%
+# sketch estimates stay within the configured relative error (3 standard errors here):
+from venn import KMVSketch, sketch_datasets, estimate_petal_counts
+from numpy import arange, float32
+from venn._compute import compute_petal_counts
+error = .02
+data = {"A": set(range(0, 60000)), "B": set(range(40000, 100000)), "C": set(range(50000, 70000))}
+sketches = sketch_datasets(data, error=error)
+for name, dataset in data.items():
+    assert abs(sketches[name].estimate() - len(dataset)) < 3 * error * len(dataset), name
+petal_counts = compute_petal_counts(data.values())
+estimates = estimate_petal_counts(sketches.values())
+union_size = sum(petal_counts)
+assert abs(sum(estimates) - union_size) < 3 * error * union_size
+for mask, count in enumerate(petal_counts):
+    # every petal is a sample of the union, so its error is relative to the union:
+    assert abs(estimates[mask] - count) < 3 * error * union_size, (mask, estimates[mask], count)
+# sketches of the same elements agree whatever their Python or NumPy type:
+integers, floats = arange(30000), arange(30000) / 4
+for values in integers, floats:
+    sketch = KMVSketch(error=error).update(values)
+    assert sketch.hashes == KMVSketch(error=error).update(set(values)).hashes
+    assert sketch.hashes == KMVSketch(error=error).update(values.tolist()).hashes
+    assert sketch.hashes == KMVSketch(error=error).update(values.astype(float32)).hashes
+assert KMVSketch().update(integers).hashes == KMVSketch().update(integers.astype(float)).hashes
+
+# %%
+# pyvenn writes the same petal and set files as venn(), and reports bad input as usage errors:
+from contextlib import redirect_stderr
+from io import StringIO
+from venn._cli import main as pyvenn
+with TemporaryDirectory() as tmp:
+    data = {"a": {"1", "2", "3", "x"}, "b": {"2", "3", "4"}, "c": {"3", "4", "5", "x"}}
+    for name, dataset in data.items():
+        with open(os.path.join(tmp, name + ".txt"), "w") as handle:
+            handle.write("\n".join(sorted(dataset)) + "\n")
+    inputs = [os.path.join(tmp, name + ".txt") for name in data]
+    with redirect_stderr(StringIO()):
+        assert pyvenn(inputs + ["-o", os.path.join(tmp, "cli"), "--formats", "svg"]) == 0
+    ax, _ = venn.venn(data, outdir=os.path.join(tmp, "api"), formats=("svg",))
+    plt.close(ax.figure)
+    written = sorted(f for f in os.listdir(os.path.join(tmp, "api")) if f.endswith(".txt"))
+    assert written == sorted(f for f in os.listdir(os.path.join(tmp, "cli")) if f.endswith(".txt"))
+    assert same_files(os.path.join(tmp, "api"), os.path.join(tmp, "cli"), written)
+    with open(os.path.join(tmp, "latin1.txt"), "wb") as handle:
+        handle.write(b"caf\xe9\n")
+    for argv in [
+        inputs + ["--names", "A,B"], inputs + ["--pseudovenn"],
+        inputs + [os.path.join(tmp, "missing.txt")], inputs + [os.path.join(tmp, "latin1.txt")],
+    ]:
+        stderr_text = StringIO()
+        try:
+            with redirect_stderr(stderr_text):
+                pyvenn(argv + ["-o", os.path.join(tmp, "bad")])
+        except SystemExit as e:
+            assert e.code == 2 and "pyvenn: error:" in stderr_text.getvalue(), argv
+        else:
+            raise AssertionError(argv)
+
+# %%
+# result cache: hits restore the same files, stats() counts lookups, old entries are evicted past max_bytes:
+from venn import ResultCache
+data = {"A": set(range(0, 600)), "B": set(range(400, 1000)), "C": set(range(300, 700))}
+with TemporaryDirectory() as tmp:
+    cache = ResultCache(os.path.join(tmp, "cache"))
+    ax, _ = venn.venn(data, outdir=os.path.join(tmp, "miss"), formats=("svg",), cache=cache)
+    plt.close(ax.figure)
+    ax, _ = venn.venn(data, outdir=os.path.join(tmp, "hit"), formats=("svg",), cache=cache)
+    assert ax is None
+    assert same_files(os.path.join(tmp, "miss"), os.path.join(tmp, "hit"), os.listdir(os.path.join(tmp, "miss")))
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["hit_rate"]) == (1, 1, 1, .5), stats
+    cache.max_bytes = int(stats["bytes"] * 1.5)
+    ax, _ = venn.venn({"A": data["A"], "B": data["C"], "C": data["B"]}, outdir=os.path.join(tmp, "other"), formats=("svg",), cache=cache)
+    plt.close(ax.figure)
+    assert cache.stats()["entries"] == 1
+    assert venn.venn(data, outdir=os.path.join(tmp, "evicted"), formats=("svg",), cache=cache)[0] is not None
+    plt.close("all")
+    # equal but differently typed elements, and another engine, are written differently and must miss:
+    for other, engine in [({"A": {1.0, 2.0}, "B": {2, 3}}, "auto"), ({"A": {1, 2}, "B": {2.0, 3.0}}, "numpy")]:
+        ax, _ = venn.venn({"A": {1, 2}, "B": {2, 3}}, outdir=os.path.join(tmp, "ints"), formats=("svg",), cache=cache)
+        plt.close("all")
+        misses = cache.misses
+        ax, outname = venn.venn(other, outdir=os.path.join(tmp, "other-" + engine), formats=("svg",), cache=cache, engine=engine)
+        assert (ax is not None) and (cache.misses == misses + 1)
+        plt.close(ax.figure)
+
+# %%
+# bundle members equal the loose files, and every figure link points to an existing row of the bundle index:
+from zipfile import ZipFile
+from re import findall
+data = {"A": {1, 2, 3, 10}, "B": {2, 3, 4}, "C": {3, 4, 5, 10}}
+with TemporaryDirectory() as tmp:
+    ax, outname = venn.venn(data, outdir=os.path.join(tmp, "files"), formats=("svg",))
+    plt.close(ax.figure)
+    ax, outname = venn.venn(data, outdir=os.path.join(tmp, "bundle"), formats=("svg",), output="bundle")
+    plt.close(ax.figure)
+    assert sorted(os.listdir(os.path.join(tmp, "bundle"))) == [outname + "bundle.html", outname + "bundle.zip", outname + "venn.svg"]
+    loose_files = [f for f in os.listdir(os.path.join(tmp, "files")) if f.endswith(".txt")]
+    with ZipFile(os.path.join(tmp, "bundle", outname + "bundle.zip")) as bundle:
+        assert sorted(bundle.namelist()) == sorted(loose_files)
+        for filename in loose_files:
+            with open(os.path.join(tmp, "files", filename), "rb") as handle:
+                assert bundle.read(filename) == handle.read(), filename
+    with open(os.path.join(tmp, "bundle", outname + "bundle.html")) as handle:
+        anchors = set(findall(r'<tr id="([^"]+)"', handle.read()))
+    with open(os.path.join(tmp, "bundle", outname + "venn.svg")) as handle:
+        links = findall(r'href="([^"#]+)#([^"]+)"', handle.read())
+    assert {page for page, _ in links} == {outname + "bundle.html"}
+    assert {anchor for _, anchor in links} == anchors == set(loose_files)
+
+# %%
+# sharded partitioning must give the same labels and files as the serial path:
+from venn._compute import compute_petal_counts
+from concurrent.futures import ThreadPoolExecutor
+datasets = [set(rng.sample(range(5000), 2000)) for _ in range(5)]
+for engine, inputs in [("python", datasets), ("numpy", [array(sorted(d)) for d in datasets])]:
+    with TemporaryDirectory() as serial_dir, TemporaryDirectory() as sharded_dir:
+        serial = generate_petal_labels(inputs, outdir=serial_dir, engine=engine)
+        assert generate_petal_labels(inputs, outdir=sharded_dir, engine=engine, workers=3) == serial
+        assert same_files(serial_dir, sharded_dir, serial[1].values())
+    assert compute_petal_counts(inputs, engine=engine, workers=3) == compute_petal_counts(inputs, engine=engine)
+# concurrent sharded calls must not see each other's shards:
+inputs = [datasets, [set(rng.sample(range(5000), 1000)) for _ in range(3)]]
+expected = [compute_petal_counts(datasets_) for datasets_ in inputs]
+with ThreadPoolExecutor(max_workers=8) as executor:
+    counts = list(executor.map(lambda i: compute_petal_counts(inputs[i % 2], workers=3), range(24)))
+assert counts == [expected[i % 2] for i in range(24)]
+
+# %%
+# sparse intersections: only observed masks are counted, ranked by size (ties by mask) and cut at top_k/min_size:
+from venn import compute_intersection_sizes
+from venn._compute import count_observed_masks, rank_intersections
+data = {name: set(range(i, i + 10)) for i, name in enumerate("ABCDEFGHIJ")}
+mask_counts = count_observed_masks(data.values())
+assert sum(mask_counts.values()) == 19 and all(mask_counts.values())
+assert rank_intersections({1: 5, 2: 7, 4: 5, 8: 1}) == [2, 1, 4, 8]
+assert rank_intersections({1: 5, 2: 7, 4: 5, 8: 1}, top_k=2) == [2, 1]
+assert rank_intersections({1: 5, 2: 7, 4: 5, 8: 1}, min_size=5) == [2, 1, 4]
+for name in "ABK":
+    data[name] = data.get(name, set()) | {100, 101, 102}
+sizes = compute_intersection_sizes(data.values(), top_k=3)
+# 100-102 are the only elements that share an intersection (A, B and K); ties are broken by smaller mask:
+assert list(sizes) == ["11000000001", "00000000010", "00000000110"]
+assert [size.size for size in sizes.values()] == [3, 1, 1]
+assert abs(sizes["11000000001"].percentage - 100 * 3 / 22) < 1e-9
+assert compute_intersection_sizes([array(sorted(v)) for v in data.values()], top_k=3) == sizes
+with TemporaryDirectory() as tmp:
+    from venn import upset
+    axes, outname = upset(data, top_k=5, outdir=tmp, formats=("svg",))
+    plt.close(axes[0].figure)
+    assert os.listdir(tmp) == [outname + "upset.svg"]
+
+# %%
+# async front end: same files as venn(), rendered off the event loop, with concurrent calls kept apart:
+import asyncio
+from venn import pseudovenn_async, AsyncVenn
+
+async def render_concurrently(datas, outdir):
+    renderer = AsyncVenn(max_pending=2)
+    return await asyncio.gather(*(
+        renderer.venn(data, outdir=os.path.join(outdir, str(i)), formats=("svg",)) for i, data in enumerate(datas)
+    ))
+
+datas = [{"A": set(range(i, i + 5)), "B": set(range(3, 9))} for i in range(4)]
+with TemporaryDirectory() as tmp:
+    rendered = asyncio.run(render_concurrently(datas, tmp))
+    for i, (data, rendered_venn) in enumerate(zip(datas, rendered)):
+        ax, _ = venn.venn(data, outdir=os.path.join(tmp, "sync"), formats=("svg",))
+        plt.close(ax.figure)
+        petal_files = [f for f in rendered_venn.files if f.endswith(".txt")]
+        assert sorted(os.listdir(os.path.join(tmp, str(i)))) == sorted(rendered_venn.files)
+        assert same_files(os.path.join(tmp, "sync"), os.path.join(tmp, str(i)), petal_files)
+    in_memory = asyncio.run(pseudovenn_async(
+        {name: set(range(i, i + 6)) for i, name in enumerate("ABCDEF")}, outdir=None, formats=("png",), counts_only=True,
+    ))
+    assert (in_memory.outdir is None) and list(in_memory.files) == [in_memory.outname + "venn.png"]
+    assert plt.get_fignums() == []
+
+# %%
+# pseudovenn hints from petal counts equal the totals of hidden petals parsed from labels:
+from venn._compute import compute_hidden_counts, format_petal_labels
+from venn._constants import PSEUDOVENN_PETAL_COORDS
+for _ in range(5):
+    petal_counts = [0] + [rng.randrange(100) for _ in range(63)]
+    petal_labels = format_petal_labels(petal_counts)
+    hidden = [0] * 6
+    for logic in petal_labels:
+        if logic not in PSEUDOVENN_PETAL_COORDS[6]:
+            hidden = venn.update_hidden(hidden, logic, petal_labels)
+    assert compute_hidden_counts(petal_counts) == hidden
+# and any label format can be combined with hints:
+with TemporaryDirectory() as tmp:
+    ax, _ = venn.pseudovenn(
+        {name: set(range(i, i + 20)) for i, name in enumerate("ABCDEF")},
+        fmt="{percentage:.1f}%", outdir=tmp, formats=("svg",), counts_only=True,
+    )
+    plt.close(ax.figure)
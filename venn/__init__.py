@@ -1,5 +1,31 @@
-from ._venn import venn, pseudovenn
-from ._venn import generate_petal_labels, generate_colors
-from ._venn import draw_venn, draw_pseudovenn6
-from ._backwards_compatibility import get_labels
-from ._backwards_compatibility import venn2, venn3, venn4, venn5, venn6
+from ._compute import generate_petal_labels, compute_petal_sizes, compute_intersection_sizes
+from ._sketch import KMVSketch, sketch_datasets, estimate_petal_counts
+from ._result import VennResult
+from ._svg import venn_svg, draw_venn_svg, draw_pseudovenn6_svg, write_svg
+from ._profile import Profile, add_profile_hook, remove_profile_hook
+
+PLOTTING_NAMES = {
+    "venn": "._venn", "pseudovenn": "._venn", "generate_colors": "._venn",
+    "draw_venn": "._venn", "draw_pseudovenn6": "._venn",
+    "clear_figure_templates": "._venn",
+    "upset": "._upset", "draw_upset": "._upset",
+    "venn_async": "._async", "pseudovenn_async": "._async", "AsyncVenn": "._async",
+    "venn_batch": "._batch", "BatchResult": "._batch",
+    "IncrementalVenn": "._incremental", "ResultCache": "._cache",
+    "get_labels": "._backwards_compatibility",
+    "venn2": "._backwards_compatibility", "venn3": "._backwards_compatibility",
+    "venn4": "._backwards_compatibility", "venn5": "._backwards_compatibility",
+    "venn6": "._backwards_compatibility",
+}
+
+def __getattr__(name):
+    """Import matplotlib-based plotting layer (and asyncio, process pool and cache front ends) only when one of their names is first accessed"""
+    if name in PLOTTING_NAMES:
+        from importlib import import_module
+        value = getattr(import_module(PLOTTING_NAMES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(PLOTTING_NAMES))
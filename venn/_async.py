@@ -0,0 +1,90 @@
+from ._compute import resolve_engine
+from ._output import MemoryOutput, pack_bundle, get_bundle_name, get_bundle_index_name, render_bundle_index
+from asyncio import Semaphore, get_running_loop
+from collections import namedtuple
+from functools import partial
+from weakref import WeakKeyDictionary
+import os
+
+RenderedVenn = namedtuple("RenderedVenn", ["outdir", "outname", "files"])
+
+DEFAULT_RENDERERS = WeakKeyDictionary()
+
+def render_venn_files(data, pseudovenn=False, formats=None, output="files", **kwargs):
+    """Partition and draw on a figure not managed by pyplot, and render every output file into memory"""
+    from ._venn import venn_dispatch, draw_venn, draw_pseudovenn6, render_figure, FIGURE_FORMATS
+    from matplotlib.figure import Figure
+    func = draw_pseudovenn6 if pseudovenn else draw_venn
+    ax = Figure(figsize=kwargs.get("figsize", (8, 8))).add_subplot()
+    counts_only = kwargs.pop("counts_only", False) or (
+        resolve_engine(data.values(), kwargs.get("engine", "auto")) == "sketch"
+    )
+    if counts_only:
+        ax, outname = venn_dispatch(
+            data, func, hint_hidden=pseudovenn, ax=ax, formats=(), counts_only=True, output=output, **kwargs
+        )
+        files = {}
+    else:
+        result = venn_dispatch(
+            data, func, hint_hidden=pseudovenn, ax=ax, formats=(), lazy=True, output=output, **kwargs
+        )
+        outname, petal_output = result.outname, MemoryOutput()
+        result.export(".", output=petal_output, sort_output=kwargs.get("sort_output", True))
+        if output == "bundle":
+            files = {
+                get_bundle_name(outname): pack_bundle(petal_output.files),
+                get_bundle_index_name(outname): render_bundle_index(
+                    get_bundle_name(outname), petal_output.members,
+                ).encode("utf-8"),
+            }
+        else:
+            files = petal_output.files
+    files.update(render_figure(ax.figure, outname, FIGURE_FORMATS if formats is None else formats))
+    return outname, files
+
+def write_files(outdir, files):
+    os.makedirs(outdir, exist_ok=True)
+    for filename, content in files.items():
+        with open(os.path.join(outdir, filename), "wb") as handle:
+            handle.write(content)
+
+class AsyncVenn:
+    """Generate diagrams from asyncio code: partitioning and drawing run in executor, files are written off the event loop, and at most max_pending diagrams are in flight"""
+
+    def __init__(self, executor=None, max_pending=None):
+        # executor=None uses the loop's default thread pool; a ProcessPoolExecutor runs diagrams on other cores
+        self.executor = executor
+        self.semaphore = Semaphore(max_pending or os.cpu_count() or 1)
+
+    async def venn(self, data, outdir=".", **kwargs):
+        """Like `venn()`, but awaitable; outdir=None keeps files in memory only"""
+        return await self.draw(data, pseudovenn=False, outdir=outdir, **kwargs)
+
+    async def pseudovenn(self, data, outdir=".", **kwargs):
+        """Like `pseudovenn()`, but awaitable; outdir=None keeps files in memory only"""
+        return await self.draw(data, pseudovenn=True, outdir=outdir, **kwargs)
+
+    async def draw(self, data, pseudovenn=False, outdir=".", **kwargs):
+        async with self.semaphore:
+            loop = get_running_loop()
+            outname, files = await loop.run_in_executor(
+                self.executor, partial(render_venn_files, data, pseudovenn=pseudovenn, **kwargs),
+            )
+            if outdir is not None:
+                await loop.run_in_executor(None, write_files, outdir, files)
+        return RenderedVenn(outdir, outname, files)
+
+def get_default_renderer():
+    """AsyncVenn shared by `venn_async()` and `pseudovenn_async()` calls on the running event loop"""
+    loop = get_running_loop()
+    if loop not in DEFAULT_RENDERERS:
+        DEFAULT_RENDERERS[loop] = AsyncVenn()
+    return DEFAULT_RENDERERS[loop]
+
+async def venn_async(data, renderer=None, **kwargs):
+    """Awaitable `venn()`; returns RenderedVenn(outdir, outname, files) with contents of written files"""
+    return await (renderer or get_default_renderer()).venn(data, **kwargs)
+
+async def pseudovenn_async(data, renderer=None, **kwargs):
+    """Awaitable `pseudovenn()`; returns RenderedVenn(outdir, outname, files) with contents of written files"""
+    return await (renderer or get_default_renderer()).pseudovenn(data, **kwargs)
@@ -0,0 +1,18 @@
+from sys import modules, platform
+from os import environ
+
+def is_headless():
+    """Check if there is no display to open figures on (and no notebook to show them in)"""
+    if "ipykernel" in modules:
+        return False
+    elif platform.startswith("linux"):
+        return not (environ.get("DISPLAY") or environ.get("WAYLAND_DISPLAY"))
+    else:
+        return False
+
+def use_headless_backend():
+    """Force non-interactive Agg backend when headless, so pyplot does not probe for GUI backends"""
+    if ("MPLBACKEND" not in environ) and ("matplotlib.pyplot" not in modules):
+        if is_headless():
+            from matplotlib import use
+            use("Agg")
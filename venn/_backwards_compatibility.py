@@ -1,5 +1,6 @@
 from warnings import warn
-from ._venn import generate_petal_labels, draw_venn
+from ._compute import generate_petal_labels
+from ._venn import draw_venn
 from functools import partial
 
 OLD_COLORS = [
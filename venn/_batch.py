@@ -0,0 +1,82 @@
+from ._store import ElementStore
+from ._result import VennResult
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations as iter_combinations
+from traceback import format_exc
+import os
+
+BatchResult = namedtuple("BatchResult", ["names", "outdir", "petal_counts", "error"])
+
+BATCH_STATE = {"elements": None, "datasets": None}
+
+def encode_batch_datasets(datasets, store):
+    """Intern elements into arrays of distinct integer IDs of an element store shared by the whole batch"""
+    encoded = {}
+    for name, dataset in datasets.items():
+        if hasattr(dataset, "dtype"):
+            from numpy import unique
+            dataset = unique(dataset).tolist()
+        encoded[name] = store.encode(dataset)
+    return encoded
+
+def init_batch_worker(elements, datasets):
+    """Keep shared element table (and pool of encoded sets, if any) in the worker process"""
+    BATCH_STATE["elements"], BATCH_STATE["datasets"] = elements, datasets
+
+def run_batch_job(job):
+    """Partition, draw and export one diagram on a figure outside pyplot; errors are returned, not raised"""
+    names, data, outdir, pseudovenn, export, kwargs = job
+    try:
+        if data is None:
+            data = {name: BATCH_STATE["datasets"][name] for name in names}
+        from ._venn import venn_dispatch, draw_venn, draw_pseudovenn6
+        if not (kwargs.get("reuse_figure") or kwargs.get("ax")):
+            # figure is not managed by pyplot, so nothing stays open however the job ends:
+            from matplotlib.figure import Figure
+            kwargs = dict(kwargs, ax=Figure(figsize=kwargs.get("figsize", (8, 8))).add_subplot())
+        # petals are indexed straight from the ID arrays; IDs decode through the shared element table:
+        result = VennResult.from_id_arrays(names, data.values(), BATCH_STATE["elements"])
+        result = venn_dispatch(
+            result, func=draw_pseudovenn6 if pseudovenn else draw_venn,
+            hint_hidden=pseudovenn, outdir=outdir, lazy=True, **kwargs
+        )
+        if export:
+            result.export(
+                outdir, output=kwargs.get("output", "files"),
+                sort_output=kwargs.get("sort_output", True),
+            )
+        return BatchResult(names, outdir, result.petal_counts, None)
+    except Exception:
+        return BatchResult(names, outdir, None, format_exc())
+
+def venn_batch(jobs, combinations=None, workers=None, outdir=".", pseudovenn=False, export=True, **kwargs):
+    """Draw many diagrams over a process pool; `jobs` is a list of dataset dicts, or one pool of sets to draw `combinations` of"""
+    # combinations: iterable of tuples of names, or an integer to draw all combinations of that many sets;
+    # every diagram goes to its own subdirectory of outdir, other kwargs are passed on to venn()/pseudovenn()
+    store = ElementStore()
+    if combinations is None:
+        pool_datasets = None
+        tasks = []
+        for i, data in enumerate(jobs):
+            names = tuple(data.keys())
+            job_outdir = os.path.join(outdir, "%04d.%s" % (i, "__vs__".join(map(str, names))))
+            encoded = encode_batch_datasets(data, store)
+            tasks.append((names, encoded, job_outdir, pseudovenn, export, kwargs))
+    else:
+        pool_datasets = encode_batch_datasets(jobs, store)
+        if isinstance(combinations, int):
+            combinations = iter_combinations(jobs.keys(), combinations)
+        tasks = [
+            (tuple(names), None, os.path.join(outdir, "__vs__".join(map(str, names))), pseudovenn, export, kwargs)
+            for names in combinations
+        ]
+    elements = store.freeze().elements
+    if workers == 1:
+        init_batch_worker(elements, pool_datasets)
+        try:
+            return [run_batch_job(task) for task in tasks]
+        finally:
+            init_batch_worker(None, None)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_batch_worker, initargs=(elements, pool_datasets)) as executor:
+        return list(executor.map(run_batch_job, tasks))
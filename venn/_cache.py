@@ -0,0 +1,105 @@
+from ._sketch import KMVSketch
+from hashlib import sha256
+from shutil import copy2, rmtree
+from uuid import uuid4
+import os
+
+def dataset_digest(dataset):
+    """Order-independent, type-aware digest of a set, array or sketch"""
+    if isinstance(dataset, KMVSketch):
+        return "sketch:" + sha256(dataset.to_bytes()).hexdigest()
+    elif hasattr(dataset, "dtype"):
+        from numpy import unique
+        values = unique(dataset)
+        if values.dtype.kind == "O":
+            return dataset_digest(set(values.tolist()))
+        return "array:{}:{}".format(values.dtype.str, sha256(values.tobytes()).hexdigest())
+    else:
+        # elements that compare equal but are written differently (1, 1.0, True) must not share a digest:
+        encoded = sorted(
+            "{}.{}:{!r}".format(type(element).__module__, type(element).__qualname__, element).encode()
+            for element in dataset
+        )
+        digest = sha256()
+        for item in encoded:
+            digest.update(len(item).to_bytes(8, "little") + item)
+        return "set:{}:{}".format(len(dataset), digest.hexdigest())
+
+def get_cache_key(data, **params):
+    """Hash of dataset labels and contents together with render parameters"""
+    digest = sha256()
+    for name, dataset in data.items():
+        digest.update(repr(name).encode() + b"\0" + dataset_digest(dataset).encode() + b"\0")
+    for name, value in sorted(params.items()):
+        digest.update("{}={!r}\0".format(name, value).encode())
+    return digest.hexdigest()
+
+class ResultCache:
+    """On-disk cache of petal, set and figure files keyed by content hash, with size-bounded LRU eviction"""
+
+    def __init__(self, directory, max_bytes=2**30):
+        self.directory, self.max_bytes = directory, max_bytes
+        self.hits, self.misses = 0, 0
+        os.makedirs(directory, exist_ok=True)
+
+    def entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key, outdir):
+        """Copy cached files into outdir and return True on hit"""
+        entry = self.entry(key)
+        if not os.path.isdir(entry):
+            self.misses += 1
+            return False
+        os.makedirs(outdir, exist_ok=True)
+        for filename in os.listdir(entry):
+            copy2(os.path.join(entry, filename), os.path.join(outdir, filename))
+        os.utime(entry)
+        self.hits += 1
+        return True
+
+    def put(self, key, outdir, filenames):
+        """Store files written to outdir under key, then evict least recently used entries"""
+        staging = self.entry(".tmp-" + uuid4().hex)
+        os.makedirs(staging)
+        for filename in filenames:
+            copy2(os.path.join(outdir, filename), os.path.join(staging, filename))
+        try:
+            os.rename(staging, self.entry(key))
+        except OSError:
+            # a concurrent run has stored the same entry:
+            rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def get_entry_sizes(self):
+        """Size in bytes and last use time of every entry"""
+        sizes = {}
+        for key in os.listdir(self.directory):
+            entry = self.entry(key)
+            if key.startswith(".tmp-") or not os.path.isdir(entry):
+                continue
+            sizes[key] = (
+                sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry)),
+                os.path.getmtime(entry),
+            )
+        return sizes
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        sizes = self.get_entry_sizes()
+        total = sum(size for size, _ in sizes.values())
+        for key in sorted(sizes, key=lambda key: sizes[key][1]):
+            if total <= self.max_bytes:
+                break
+            rmtree(self.entry(key), ignore_errors=True)
+            total -= sizes[key][0]
+
+    def stats(self):
+        """Hit/miss counters of this cache object and current size on disk"""
+        sizes = self.get_entry_sizes()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(sizes), "bytes": sum(size for size, _ in sizes.values()),
+        }
@@ -0,0 +1,158 @@
+from ._compute import compute_membership
+from ._result import VennResult
+from ._store import PetalIndex
+from ._output import get_link_prefix
+from ._profile import Profile, profiling, stage
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from mmap import mmap, ACCESS_READ
+from time import perf_counter
+from sys import stderr, platform
+import os
+
+def iter_lines(filename):
+    """Stream non-empty lines of a file through a read-only memory map"""
+    with open(filename, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap(handle.fileno(), 0, access=ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b""):
+                line = line.rstrip(b"\r\n")
+                if line:
+                    yield line.decode()
+
+def stream_tsv_membership(filename, columns=None):
+    """Compute membership masks of TSV columns (selected by header name or 1-based index) in one pass"""
+    lines = iter_lines(filename)
+    header = next(lines, "").split("\t")
+    if columns is None:
+        indices = list(range(len(header)))
+    else:
+        indices = []
+        for column in columns:
+            if column.isdigit() and (1 <= int(column) <= len(header)):
+                indices.append(int(column) - 1)
+            elif column in header:
+                indices.append(header.index(column))
+            else:
+                raise ValueError("no such column in {}: {}".format(filename, column))
+    n_sets = len(indices)
+    bits = [1 << (n_sets - 1 - j) for j in range(n_sets)]
+    membership = {}
+    for line in lines:
+        fields = line.split("\t")
+        for index, bit in zip(indices, bits):
+            if (index < len(fields)) and fields[index]:
+                membership[fields[index]] = membership.get(fields[index], 0) | bit
+    return [header[index] for index in indices], membership
+
+def get_peak_rss():
+    """Peak resident set size of this process in bytes, or None if not available"""
+    try:
+        from resource import getrusage, RUSAGE_SELF
+    except ImportError:
+        return None
+    peak = getrusage(RUSAGE_SELF).ru_maxrss
+    return peak if platform == "darwin" else peak * 1024
+
+def get_parser():
+    parser = ArgumentParser(
+        prog="pyvenn",
+        description="Venn diagrams for 2-6 files with one element per line, or for columns of a TSV file",
+    )
+    parser.add_argument("inputs", nargs="+", help="input files (one TSV file with --tsv)")
+    parser.add_argument("--tsv", action="store_true", help="treat the single input as a TSV file with a header; its columns are the sets")
+    parser.add_argument("--columns", help="comma-separated TSV column names or 1-based indices (default: all)")
+    parser.add_argument("--names", help="comma-separated dataset labels (default: file names without extension)")
+    parser.add_argument("-o", "--outdir", default=".", help="output directory (default: %(default)s)")
+    parser.add_argument("--fmt", default="{size}", help="petal label format (default: %(default)s)")
+    parser.add_argument("--pseudovenn", action="store_true", help="draw pseudovenn diagram of 6 circles")
+    parser.add_argument("--no-hint-hidden", action="store_true", help="do not show counts hidden by the pseudovenn diagram")
+    parser.add_argument("--cmap", default="viridis", help="colormap name or comma-separated colors (default: %(default)s)")
+    parser.add_argument("--alpha", type=float, default=.4, help="shape opacity (default: %(default)s)")
+    parser.add_argument("--figsize", type=float, nargs=2, default=(8, 8), help="figure size in inches (default: 8 8)")
+    parser.add_argument("--fontsize", type=float, default=13, help="font size (default: %(default)s)")
+    parser.add_argument("--formats", default="pdf,png,svg,html", help="comma-separated figure formats (default: %(default)s)")
+    parser.add_argument("--counts-only", action="store_true", help="only draw the figure, do not write petal and set files")
+    parser.add_argument("--bundle", action="store_true", help="write petal and set files into a single compressed zip file, with an html index that the figure links to")
+    parser.add_argument("--profile", action="store_true", help="print wall time and memory of every stage as a JSON line to stderr")
+    parser.add_argument("--no-sort", action="store_true", help="write elements of petals and sets in arbitrary order")
+    return parser
+
+def main(argv=None):
+    """Entry point of the `pyvenn` command"""
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    names = args.names.split(",") if args.names else None
+    for filename in args.inputs:
+        if not (os.path.isfile(filename) and os.access(filename, os.R_OK)):
+            parser.error("cannot read input file: " + filename)
+    start = perf_counter()
+    profile = Profile() if args.profile else None
+    with profiling(profile) if profile else nullcontext():
+        if args.tsv:
+            if len(args.inputs) != 1:
+                parser.error("--tsv takes exactly one input file")
+            columns = args.columns.split(",") if args.columns else None
+            if names and columns and (len(names) != len(columns)):
+                parser.error("--names must give one label per column")
+            with stage("read"):
+                try:
+                    dataset_labels, membership = stream_tsv_membership(args.inputs[0], columns)
+                except UnicodeDecodeError:
+                    parser.error("input is not valid UTF-8: " + args.inputs[0])
+                except ValueError as e:
+                    parser.error(str(e))
+        else:
+            dataset_labels = [
+                os.path.splitext(os.path.basename(filename))[0] for filename in args.inputs
+            ]
+            if names and (len(names) != len(dataset_labels)):
+                parser.error("--names must give one label per input file")
+            with stage("read"):
+                try:
+                    membership = compute_membership(map(iter_lines, args.inputs))
+                except UnicodeDecodeError:
+                    parser.error("inputs must be valid UTF-8 text")
+        if names:
+            if len(names) != len(dataset_labels):
+                parser.error("--names must give one label per column")
+            dataset_labels = names
+        n_sets = len(dataset_labels)
+        if not (2 <= n_sets <= 6):
+            parser.error("number of sets must be between 2 and 6")
+        elif args.pseudovenn and (n_sets != 6):
+            parser.error("--pseudovenn needs exactly 6 sets")
+        hint_hidden = args.pseudovenn and not args.no_hint_hidden
+        output = "bundle" if args.bundle else "files"
+        # elements are grouped by mask once, so that export does not scan the membership for every petal:
+        elements, masks = list(membership.keys()), bytearray(membership.values())
+        petal_index = PetalIndex(elements, masks, n_sets)
+        result = VennResult(dataset_labels, elements, masks, petal_index.counts(), petal_index=petal_index)
+        from ._venn import draw_venn, draw_pseudovenn6, generate_colors
+        cmap = args.cmap.split(",") if "," in args.cmap else args.cmap
+        os.makedirs(args.outdir, exist_ok=True)
+        (draw_pseudovenn6 if args.pseudovenn else draw_venn)(
+            petal_labels=result.petal_labels(fmt=args.fmt), dataset_labels=dataset_labels,
+            hint_hidden=hint_hidden, figsize=tuple(args.figsize), fontsize=args.fontsize,
+            colors=generate_colors(n_colors=n_sets, cmap=cmap, alpha=args.alpha),
+            legend_loc="upper right", ax=None, outdir=args.outdir,
+            names_out=None if args.counts_only else result.names_out(),
+            outname=result.outname, data=None, dataset_sizes=result.dataset_sizes,
+            formats=[fmt for fmt in args.formats.split(",") if fmt],
+            link_prefix=get_link_prefix(output, result.outname),
+            petal_counts=result.petal_counts,
+        )
+        if not args.counts_only:
+            result.export(args.outdir, output=output, sort_output=not args.no_sort)
+    peak_rss = get_peak_rss()
+    print(
+        "pyvenn: {} sets, {} elements, wall time {:.3f} s, peak RSS {}".format(
+            n_sets, len(membership), perf_counter() - start,
+            "n/a" if peak_rss is None else "{:.1f} MiB".format(peak_rss / 2**20),
+        ),
+        file=stderr,
+    )
+    if profile:
+        print(profile.to_json(), file=stderr)
+    return 0
@@ -0,0 +1,235 @@
+from ._sketch import KMVSketch, estimate_petal_counts
+from ._output import FileOutput
+from ._constants import PSEUDOVENN_PETAL_COORDS
+from ._store import ElementStore, PetalIndex, compute_id_masks
+from ._profile import stage
+from collections import namedtuple
+from heapq import nsmallest
+from operator import itemgetter
+
+PetalSize = namedtuple("PetalSize", ["size", "percentage"])
+
+# masks of intersections that pseudovenn cannot show, grouped by member set (precomputed for `compute_hidden_counts()`):
+PSEUDOVENN_HIDDEN_MASKS = [
+    [
+        mask for mask in range(1, 2**6)
+        if (bin(mask)[2:].zfill(6) not in PSEUDOVENN_PETAL_COORDS[6]) and ((mask >> (5-i)) & 1)
+    ]
+    for i in range(6)
+]
+
+def generate_logics(n_sets):
+    """Generate intersection identifiers in binary (0010 etc)"""
+    for i in range(1, 2**n_sets):
+        yield bin(i)[2:].zfill(n_sets)
+
+def compute_membership(datasets):
+    """Map every element to its membership bitmask in a single pass over all datasets"""
+    datasets = list(datasets)
+    n_sets = len(datasets)
+    membership = {}
+    for i, dataset in enumerate(datasets):
+        bit = 1 << (n_sets - 1 - i)
+        for element in dataset:
+            membership[element] = membership.get(element, 0) | bit
+    return membership
+
+def resolve_engine(datasets, engine="auto"):
+    """Pick membership engine: 'sketch' for sketches, 'numpy' if any dataset is an array (for engine='auto'), else 'python'"""
+    datasets = list(datasets)
+    n_sketches = sum(isinstance(dataset, KMVSketch) for dataset in datasets)
+    if n_sketches and (n_sketches < len(datasets)):
+        raise TypeError("Sketches cannot be mixed with exact datasets")
+    elif n_sketches:
+        if engine not in {"auto", "sketch"}:
+            raise ValueError("Sketched datasets require engine='sketch'")
+        return "sketch"
+    elif engine == "auto":
+        if any(hasattr(dataset, "dtype") for dataset in datasets):
+            return "numpy"
+        else:
+            return "python"
+    elif engine in {"python", "numpy"}:
+        return engine
+    else:
+        raise ValueError("engine must be one of 'auto', 'python', 'numpy', 'sketch'")
+
+def use_shards(workers):
+    """Check if work should be sharded over processes (needs more than one worker and fork support)"""
+    if workers == 1:
+        return False
+    from ._sharded import get_fork_context
+    return get_fork_context() is not None
+
+def partition_datasets(datasets, engine="auto", workers=1):
+    """Group elements by membership bitmask; mask of a petal is `int(logic, 2)`; petals are sized iterables"""
+    datasets = list(datasets)
+    engine = resolve_engine(datasets, engine)
+    if engine == "sketch":
+        raise ValueError("Sketches only estimate petal sizes; petal members are not available")
+    elif use_shards(workers):
+        from ._sharded import partition_datasets_sharded
+        return partition_datasets_sharded(datasets, engine, workers)
+    elif engine == "numpy":
+        from ._vectorized import partition_arrays
+        return partition_arrays(datasets)
+    store = ElementStore()
+    id_arrays = [store.encode(dataset) for dataset in datasets]
+    store.freeze()
+    # petals are ID ranges of one array, decoded back to elements only when iterated over:
+    return PetalIndex(store.elements, compute_id_masks(id_arrays, len(store)), len(datasets))
+
+def compute_petal_counts(datasets, engine="auto", workers=1):
+    """Count elements of every petal without building petal sets; list is indexed by membership mask"""
+    datasets = list(datasets)
+    n_sets = len(datasets)
+    engine = resolve_engine(datasets, engine)
+    if engine == "sketch":
+        return estimate_petal_counts(datasets)
+    elif use_shards(workers):
+        from ._sharded import compute_petal_counts_sharded
+        return compute_petal_counts_sharded(datasets, engine, workers)
+    elif engine == "numpy":
+        from ._vectorized import compute_masks, count_masks
+        _, masks = compute_masks(datasets)
+        return count_masks(masks, n_sets).tolist()
+    petal_counts = [0] * 2**n_sets
+    for mask in compute_membership(datasets).values():
+        petal_counts[mask] += 1
+    return petal_counts
+
+def compute_dataset_sizes(petal_counts):
+    """Recover sizes of the original datasets from petal counts indexed by membership mask"""
+    n_sets = len(petal_counts).bit_length() - 1
+    return [
+        sum(c for mask, c in enumerate(petal_counts) if (mask >> (n_sets-1-i)) & 1)
+        for i in range(n_sets)
+    ]
+
+def compute_petal_sizes(datasets, engine="auto", workers=1):
+    """Compute size and percentage of every petal; no petal sets are built and nothing is written to disk"""
+    petal_counts = compute_petal_counts(datasets, engine=engine, workers=workers)
+    n_sets = len(petal_counts).bit_length() - 1
+    universe_size = sum(petal_counts)
+    return {
+        logic: PetalSize(
+            size=petal_counts[int(logic, 2)],
+            percentage=(100*petal_counts[int(logic, 2)]/max(universe_size, 1))
+        )
+        for logic in generate_logics(n_sets)
+    }
+
+def format_petal_labels(petal_counts, fmt="{size}"):
+    """Generate petal descriptions from petal counts indexed by membership mask"""
+    n_sets = len(petal_counts).bit_length() - 1
+    universe_size = sum(petal_counts)
+    return {
+        logic: fmt.format(
+            logic=logic, size=petal_counts[int(logic, 2)],
+            percentage=(100*petal_counts[int(logic, 2)]/max(universe_size, 1))
+        )
+        for logic in generate_logics(n_sets)
+    }
+
+def compute_hidden_counts(petal_counts):
+    """Per-set totals of petals that the pseudovenn diagram does not display, from counts indexed by mask"""
+    return [sum(itemgetter(*masks)(petal_counts)) for masks in PSEUDOVENN_HIDDEN_MASKS]
+
+def count_observed_masks(datasets, engine="auto"):
+    """Count elements of every non-empty intersection only, without enumerating all 2^n logics"""
+    datasets = list(datasets)
+    engine = resolve_engine(datasets, engine)
+    if engine == "sketch":
+        raise ValueError("Sparse intersections need exact datasets, not sketches")
+    elif engine == "numpy":
+        from ._vectorized import compute_masks
+        from numpy import unique
+        _, masks = compute_masks(datasets)
+        observed, counts = unique(masks, return_counts=True)
+        return dict(zip(observed.tolist(), counts.tolist()))
+    mask_counts = {}
+    for mask in compute_membership(datasets).values():
+        mask_counts[mask] = mask_counts.get(mask, 0) + 1
+    return mask_counts
+
+def rank_intersections(mask_counts, top_k=None, min_size=1):
+    """Masks of the top_k largest intersections (all if top_k is None), largest first, ties by mask"""
+    masks = (mask for mask, count in mask_counts.items() if count >= min_size)
+    if top_k is None:
+        return sorted(masks, key=lambda mask: (-mask_counts[mask], mask))
+    else:
+        return nsmallest(top_k, masks, key=lambda mask: (-mask_counts[mask], mask))
+
+def compute_intersection_sizes(datasets, top_k=None, min_size=1, engine="auto"):
+    """Compute size and percentage of the largest observed intersections of any number of sets"""
+    datasets = list(datasets)
+    n_sets = len(datasets)
+    mask_counts = count_observed_masks(datasets, engine=engine)
+    universe_size = sum(mask_counts.values())
+    return {
+        bin(mask)[2:].zfill(n_sets): PetalSize(
+            size=mask_counts[mask],
+            percentage=(100*mask_counts[mask]/max(universe_size, 1))
+        )
+        for mask in rank_intersections(mask_counts, top_k=top_k, min_size=min_size)
+    }
+
+def generate_petal_filenames(n_sets, outname="out"):
+    """Generate names of petal files (out01A.txt etc), numbered by petal degree, then alphabetically"""
+    datas = {}
+    for logic in generate_logics(n_sets):
+        name = ''.join([y for x, y in zip(logic, "ABCDEF") if int(x)])
+        datas[(logic, name)] = None
+    names = dict(zip(
+        sorted([x[1] for x in sorted(datas, key=lambda x:x[1])],key=len),
+        range(1, len(datas)+1)
+    ))
+    # print("names:", names)
+    names_out = {}
+    for x in datas:
+        logic, name = x
+        outname_final = "%s%02d%s.txt" % (
+                  outname, names[name], name)
+        names_out[logic] = outname_final
+    return names_out
+
+def write_petal_files(datasets, outname="out", outdir=".", engine="auto", output=None, sort_output=True, workers=1):
+    """Partition datasets and write one file per petal; return petal counts indexed by mask and petal file names"""
+    datasets = list(datasets)
+    n_sets = len(datasets)
+    with stage("partition"):
+        petals = partition_datasets(datasets, engine=engine, workers=workers)
+        petal_counts = [0] * 2**n_sets
+        for mask, petal_set in petals.items():
+            petal_counts[mask] = len(petal_set)
+    names_out = generate_petal_filenames(n_sets, outname=outname)
+    # output is an open writer (see `open_output()`); petal files are written into outdir by default:
+    petal_output = FileOutput(outdir, outname) if output is None else output
+    with stage("write_petals"):
+        for logic, outname_final in names_out.items():
+            petal_set = petals.get(int(logic, 2), ())
+            petal_output.write(outname_final, petal_set, sort_output=sort_output)
+    return petal_counts, names_out
+
+def generate_petal_labels(datasets, fmt="{size}", outname="out", outdir=".", engine="auto", output=None, sort_output=True, workers=1):
+    """Generate petal descriptions for venn diagram based on set sizes"""
+    petal_counts, names_out = write_petal_files(
+        datasets, outname=outname, outdir=outdir, engine=engine,
+        output=output, sort_output=sort_output, workers=workers,
+    )
+    petal_labels = format_petal_labels(petal_counts, fmt=fmt)
+    return petal_labels, names_out
+
+def is_valid_dataset_dict(data):
+    """Validate passed data (must be dictionary of sets, one-dimensional arrays or sketches)"""
+    if not (hasattr(data, "keys") and hasattr(data, "values")):
+        return False
+    for dataset in data.values():
+        if isinstance(dataset, (set, KMVSketch)):
+            continue
+        elif hasattr(dataset, "dtype") and (getattr(dataset, "ndim", None) == 1):
+            continue
+        else:
+            return False
+    else:
+        return True
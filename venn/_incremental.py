@@ -0,0 +1,109 @@
+from ._compute import compute_membership, compute_dataset_sizes, format_petal_labels
+from ._constants import PETAL_LABEL_COORDS
+
+class IncrementalVenn:
+    """Membership masks and petal counts kept up to date as elements are added to and removed from sets"""
+
+    def __init__(self, dataset_labels, fmt="{size}", cmap="viridis", alpha=.4, figsize=(8, 8), fontsize=13, legend_loc="upper right", outname="result_"):
+        self.dataset_labels = list(dataset_labels)
+        self.n_sets = len(self.dataset_labels)
+        if not (2 <= self.n_sets <= 6):
+            raise ValueError("Number of sets must be between 2 and 6")
+        self.membership = {}
+        self.petal_counts = [0] * 2**self.n_sets
+        self.changed = set()
+        self.fmt, self.cmap, self.alpha = fmt, cmap, alpha
+        self.figsize, self.fontsize, self.legend_loc = figsize, fontsize, legend_loc
+        self.outname = outname
+        self.template, self.rendered_sizes, self.rendered_universe = None, None, None
+
+    @classmethod
+    def from_datasets(cls, data, **kwargs):
+        """Start from a dictionary of sets"""
+        incremental_venn = cls(data.keys(), **kwargs)
+        incremental_venn.membership = compute_membership(data.values())
+        for mask in incremental_venn.membership.values():
+            incremental_venn.petal_counts[mask] += 1
+        return incremental_venn
+
+    def get_bit(self, set_name):
+        return 1 << (self.n_sets - 1 - self.dataset_labels.index(set_name))
+
+    def move(self, old_mask, new_mask):
+        """Move one element between petals"""
+        if old_mask:
+            self.petal_counts[old_mask] -= 1
+            self.changed.add(old_mask)
+        if new_mask:
+            self.petal_counts[new_mask] += 1
+            self.changed.add(new_mask)
+
+    def add(self, set_name, items):
+        """Add items to one set; costs O(len(items))"""
+        bit = self.get_bit(set_name)
+        for item in items:
+            old_mask = self.membership.get(item, 0)
+            if not (old_mask & bit):
+                self.membership[item] = old_mask | bit
+                self.move(old_mask, old_mask | bit)
+        return self
+
+    def remove(self, set_name, items):
+        """Remove items from one set; costs O(len(items))"""
+        bit = self.get_bit(set_name)
+        for item in items:
+            old_mask = self.membership.get(item, 0)
+            if old_mask & bit:
+                if old_mask == bit:
+                    del self.membership[item]
+                else:
+                    self.membership[item] = old_mask & ~bit
+                self.move(old_mask, old_mask & ~bit)
+        return self
+
+    @property
+    def dataset_sizes(self):
+        return compute_dataset_sizes(self.petal_counts)
+
+    def petal_labels(self, fmt=None):
+        """Generate petal descriptions from current petal counts"""
+        return format_petal_labels(self.petal_counts, fmt=fmt or self.fmt)
+
+    def render(self, outdir=".", formats=()):
+        """Draw diagram on first call; afterwards update only labels of petals whose counts changed"""
+        from ._venn import draw_venn, generate_colors, new_figure_template, save_figure
+        universe_size = len(self.membership)
+        if self.template is None:
+            self.template = new_figure_template(self.figsize)
+            draw_venn(
+                petal_labels=self.petal_labels(), dataset_labels=self.dataset_labels,
+                hint_hidden=False, figsize=self.figsize, fontsize=self.fontsize,
+                colors=generate_colors(n_colors=self.n_sets, cmap=self.cmap, alpha=self.alpha),
+                legend_loc=self.legend_loc, ax=None, names_out=None,
+                outname=self.outname, data=None, outdir=outdir,
+                dataset_sizes=self.dataset_sizes, formats=formats,
+                reuse_figure=self.template, petal_counts=self.petal_counts,
+            )
+        else:
+            if ("percentage" in self.fmt) and (universe_size != self.rendered_universe):
+                changed = range(1, 2**self.n_sets)
+            else:
+                changed = self.changed
+            petal_labels = self.petal_labels()
+            for mask in changed:
+                logic = bin(mask)[2:].zfill(self.n_sets)
+                if logic in PETAL_LABEL_COORDS[self.n_sets]:
+                    x, y = PETAL_LABEL_COORDS[self.n_sets][logic]
+                    self.template.text(logic, x, y, petal_labels[logic], self.fontsize)
+            if self.legend_loc is not None:
+                for i, (x, l) in enumerate(zip(self.dataset_labels, self.dataset_sizes)):
+                    if l != self.rendered_sizes[i]:
+                        annoloc2 = (1, 1-i*0.05)
+                        self.template.annotate(
+                            ("legend", i, 2), "%s(%s)" % (x, l), annoloc2,
+                            url=None, bbox=dict(color="w", alpha=.4, url=None)
+                        )
+            save_figure(self.template.ax.figure, outdir, self.outname, formats=formats)
+        self.changed.clear()
+        self.rendered_sizes, self.rendered_universe = self.dataset_sizes, universe_size
+        return self.template.ax
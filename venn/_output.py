@@ -0,0 +1,109 @@
+from io import TextIOWrapper, StringIO, BytesIO
+import os
+
+OUTPUT_KINDS = ("files", "bundle")
+
+def write_elements(handle, elements, sort_output=True, end=""):
+    """Stream elements to handle one per line, like `print(*sorted(elements), sep="\\n", end=end)`; return their number"""
+    n_elements = 0
+    for i, element in enumerate(sorted(elements) if sort_output else elements):
+        if i:
+            handle.write("\n")
+        handle.write(str(element))
+        n_elements += 1
+    handle.write(end)
+    return n_elements
+
+class FileOutput:
+    """Write every petal and set into its own text file in outdir"""
+
+    def __init__(self, outdir, outname):
+        self.outdir, self.outname = outdir, outname
+
+    def write(self, filename, elements, sort_output=True, end=""):
+        with open(os.path.join(self.outdir, filename), "w") as handle:
+            write_elements(handle, elements, sort_output=sort_output, end=end)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class BundleOutput(FileOutput):
+    """Write petals and sets as compressed members of a single zip file, with an html index page that figures link to"""
+
+    def __init__(self, outdir, outname):
+        self.outdir, self.outname = outdir, outname
+        from zipfile import ZipFile, ZIP_DEFLATED
+        self.bundle_name = get_bundle_name(outname)
+        self.bundle = ZipFile(os.path.join(outdir, self.bundle_name), "w", ZIP_DEFLATED)
+        self.members = {}
+
+    def write(self, filename, elements, sort_output=True, end=""):
+        with self.bundle.open(filename, "w") as raw:
+            with TextIOWrapper(raw, encoding="utf-8") as handle:
+                self.members[filename] = write_elements(handle, elements, sort_output=sort_output, end=end)
+
+    def close(self):
+        self.bundle.close()
+        with open(os.path.join(self.outdir, get_bundle_index_name(self.outname)), "w") as handle:
+            handle.write(render_bundle_index(self.bundle_name, self.members))
+
+class MemoryOutput(FileOutput):
+    """Keep petal and set files in memory as {filename: bytes}, e.g. to write them without blocking"""
+
+    def __init__(self):
+        self.files, self.members = {}, {}
+
+    def write(self, filename, elements, sort_output=True, end=""):
+        handle = StringIO()
+        self.members[filename] = write_elements(handle, elements, sort_output=sort_output, end=end)
+        self.files[filename] = handle.getvalue().encode("utf-8")
+
+def pack_bundle(files):
+    """Zip {filename: bytes} in memory the way `BundleOutput` does on disk"""
+    from zipfile import ZipFile, ZIP_DEFLATED
+    buffer = BytesIO()
+    with ZipFile(buffer, "w", ZIP_DEFLATED) as bundle:
+        for filename, content in files.items():
+            bundle.writestr(filename, content)
+    return buffer.getvalue()
+
+def get_bundle_name(outname):
+    return outname + "bundle.zip"
+
+def get_bundle_index_name(outname):
+    return outname + "bundle.html"
+
+def render_bundle_index(bundle_name, members):
+    """Html page with one anchor per bundle member ({filename: number of elements}), for figures to link to"""
+    from html import escape
+    rows = "".join(
+        '<tr id="{0}"><td>{1}</td><td>{2}</td></tr>\n'.format(escape(filename), escape(filename), n_elements)
+        for filename, n_elements in members.items()
+    )
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{0}</title>'
+        '<style>tr:target {{background: #ffe066}}</style></head><body>\n'
+        '<p>Members of <a href="{0}">{0}</a>:</p>\n'
+        '<table>\n<tr><th>member</th><th>elements</th></tr>\n{1}</table>\n</body></html>\n'
+    ).format(escape(bundle_name), rows)
+
+def get_link_prefix(output, outname):
+    """Prefix of hyperlinks to petal and set files; bundle members are linked to their row of the bundle's index page"""
+    return get_bundle_index_name(outname) + "#" if output == "bundle" else ""
+
+def open_output(outdir, outname, output="files"):
+    """Open writer for petal and set files; an already open writer is passed through"""
+    if isinstance(output, FileOutput):
+        return output
+    elif output == "files":
+        return FileOutput(outdir, outname)
+    elif output == "bundle":
+        return BundleOutput(outdir, outname)
+    else:
+        raise ValueError("output must be one of " + ", ".join(OUTPUT_KINDS))
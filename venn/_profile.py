@@ -0,0 +1,153 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+StageStats = namedtuple("StageStats", ["name", "wall_time", "allocated", "peak"])
+
+ACTIVE_PROFILE = ContextVar("ACTIVE_PROFILE", default=None)
+
+PROFILE_HOOKS = []
+
+class Profile:
+    """Wall time (s), net allocated and peak traced memory (bytes) of every stage of one call"""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages, self.frames = [], []
+        self.wall_time = None
+
+    def enter(self):
+        """Open a stage: remember where memory was, and hand the peak so far to the enclosing stage"""
+        if self.trace_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            if self.frames:
+                self.frames[-1]["floor"] = max(self.frames[-1]["floor"], peak)
+            reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+        else:
+            current = 0
+        self.frames.append({"start": perf_counter(), "current": current, "floor": current})
+
+    def exit(self, name):
+        frame = self.frames.pop()
+        wall_time = perf_counter() - frame["start"]
+        if self.trace_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame["floor"])
+            if self.frames:
+                self.frames[-1]["floor"] = max(self.frames[-1]["floor"], peak)
+            reset_peak()
+            allocated, peak = current - frame["current"], peak - frame["current"]
+        else:
+            allocated, peak = None, None
+        self.stages.append(StageStats(name, wall_time, allocated, peak))
+
+    def __getitem__(self, name):
+        """Stats of the first stage with given name"""
+        for stats in self.stages:
+            if stats.name == name:
+                return stats
+        raise KeyError(name)
+
+    def as_dict(self):
+        return {
+            "wall_time": self.wall_time,
+            "stages": [stats._asdict() for stats in self.stages],
+        }
+
+    def to_json(self):
+        """One JSON line per call, for metrics pipelines"""
+        from json import dumps
+        return dumps(self.as_dict(), separators=(",", ":"))
+
+    def log(self, logger=None, level=None):
+        """Write one log record per stage (logger 'venn' at INFO level by default)"""
+        import logging
+        logger = logger or logging.getLogger("venn")
+        level = logging.INFO if level is None else level
+        for stats in self.stages:
+            logger.log(
+                level, "%s: %.4f s, allocated %s B, peak %s B",
+                stats.name, stats.wall_time, stats.allocated, stats.peak,
+            )
+
+    def __repr__(self):
+        return "Profile(wall_time={!r}, stages={!r})".format(self.wall_time, self.stages)
+
+def reset_peak():
+    # tracemalloc.reset_peak() appeared in Python 3.9; earlier, peaks are counted from start of tracing
+    import tracemalloc
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+@contextmanager
+def stage(name):
+    """Record wall time and memory of the enclosed block if a profile is active; no-op otherwise"""
+    profile = ACTIVE_PROFILE.get()
+    if profile is None:
+        yield
+        return
+    profile.enter()
+    try:
+        yield
+    finally:
+        profile.exit(name)
+
+@contextmanager
+def profiling(profile):
+    """Make profile active in this context (tracing memory if needed); hooks are called when the block ends"""
+    # tracemalloc is only imported once a profile is used, to keep `import venn` light:
+    import tracemalloc
+    started_tracing = profile.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = ACTIVE_PROFILE.set(profile)
+    start = perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.wall_time = perf_counter() - start
+        ACTIVE_PROFILE.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+    for hook in PROFILE_HOOKS:
+        hook(profile)
+
+def resolve_profile(profile):
+    """Profile to record into: passed Profile, new one for profile=True or registered hooks, else None"""
+    if isinstance(profile, Profile):
+        return profile
+    elif profile or PROFILE_HOOKS:
+        return Profile()
+    else:
+        return None
+
+def add_profile_hook(hook):
+    """Profile every call from now on and pass each finished Profile to hook (e.g. `lambda p: print(p.to_json())`)"""
+    PROFILE_HOOKS.append(hook)
+    return hook
+
+def remove_profile_hook(hook):
+    PROFILE_HOOKS.remove(hook)
+
+def profiled(function):
+    """Run function under a Profile when `profile=` asks for one or hooks are registered; the Profile is appended to returned tuple (or set as `.profile` of returned object) only if it was asked for"""
+    @wraps(function)
+    def wrapper(*args, profile=False, **kwargs):
+        active_profile = resolve_profile(profile)
+        if active_profile is None:
+            return function(*args, **kwargs)
+        with profiling(active_profile):
+            returned = function(*args, **kwargs)
+        if not profile:
+            return returned
+        elif isinstance(returned, tuple):
+            return returned + (active_profile,)
+        else:
+            returned.profile = active_profile
+            return returned
+    return wrapper
@@ -0,0 +1,119 @@
+from ._compute import resolve_engine, compute_dataset_sizes
+from ._compute import format_petal_labels, generate_petal_filenames
+from ._store import ElementStore, PetalIndex, compute_id_masks, iter_member_ids
+from ._output import open_output
+from ._profile import stage
+import os
+
+class VennResult:
+    """Per-element membership masks and petal counts; petal members are only built on request"""
+
+    def __init__(self, dataset_labels, elements, masks, petal_counts, outname="result_", ax=None, petal_index=None):
+        self.dataset_labels = list(dataset_labels)
+        self.n_sets = len(self.dataset_labels)
+        self.elements, self.masks = elements, masks
+        self.petal_counts = list(petal_counts)
+        self.outname, self.ax = outname, ax
+        self.petal_index = petal_index
+
+    @classmethod
+    def from_datasets(cls, data, engine="auto", **kwargs):
+        """Compute membership masks of a dictionary of sets or arrays"""
+        datasets = list(data.values())
+        n_sets = len(datasets)
+        if resolve_engine(datasets, engine) == "numpy":
+            from ._vectorized import compute_masks, count_masks
+            elements, masks = compute_masks(datasets)
+            petal_counts = count_masks(masks, n_sets).tolist()
+        else:
+            store = ElementStore()
+            id_arrays = [store.encode(dataset) for dataset in datasets]
+            store.freeze()
+            elements, masks = store.elements, compute_id_masks(id_arrays, len(store))
+            kwargs["petal_index"] = PetalIndex(elements, masks, n_sets)
+            petal_counts = kwargs["petal_index"].counts()
+        return cls(data.keys(), elements, masks, petal_counts, **kwargs)
+
+    @classmethod
+    def from_id_arrays(cls, dataset_labels, id_arrays, elements, **kwargs):
+        """Index datasets given as arrays of distinct IDs into a shared element table (see `ElementStore`)"""
+        id_arrays = list(id_arrays)
+        masks = compute_id_masks(id_arrays, len(elements))
+        petal_index = PetalIndex(elements, masks, len(id_arrays), ids=iter_member_ids(id_arrays, masks))
+        return cls(dataset_labels, elements, masks, petal_index.counts(), petal_index=petal_index, **kwargs)
+
+    def get_mask(self, key):
+        """Convert petal key (mask, logic like '101', or letters like 'AC') to membership mask"""
+        if isinstance(key, int):
+            mask = key
+        elif len(key) == self.n_sets and set(key) <= {"0", "1"}:
+            mask = int(key, 2)
+        elif set(key) <= set("ABCDEF"[:self.n_sets]):
+            mask = sum(1 << (self.n_sets-1-"ABCDEF".index(c)) for c in set(key))
+        else:
+            raise KeyError("Key not understood: " + str(key))
+        if not (0 < mask < 2**self.n_sets):
+            raise KeyError("Key not understood: " + str(key))
+        return mask
+
+    def iter_petal(self, key):
+        """Iterate over members of one petal"""
+        mask = self.get_mask(key)
+        if self.petal_index is not None:
+            yield from self.petal_index.get(mask, ())
+        elif hasattr(self.masks, "dtype"):
+            yield from self.elements[self.masks == mask].tolist()
+        else:
+            yield from (
+                element for element, element_mask in zip(self.elements, self.masks)
+                if element_mask == mask
+            )
+
+    def petal(self, key):
+        """Materialize members of one petal as a set"""
+        return set(self.iter_petal(key))
+
+    def __getitem__(self, key):
+        return self.petal(key)
+
+    def iter_dataset(self, i):
+        """Iterate over members of i-th original dataset"""
+        bit = 1 << (self.n_sets-1-i)
+        if self.petal_index is not None:
+            for mask in self.petal_index:
+                if mask & bit:
+                    yield from self.petal_index[mask]
+        elif hasattr(self.masks, "dtype"):
+            yield from self.elements[(self.masks & bit) != 0].tolist()
+        else:
+            yield from (
+                element for element, element_mask in zip(self.elements, self.masks)
+                if element_mask & bit
+            )
+
+    @property
+    def dataset_sizes(self):
+        return compute_dataset_sizes(self.petal_counts)
+
+    def petal_labels(self, fmt="{size}"):
+        """Generate petal descriptions from petal counts"""
+        return format_petal_labels(self.petal_counts, fmt=fmt)
+
+    def names_out(self):
+        """Names of petal files that `export()` writes, keyed by logic"""
+        return generate_petal_filenames(self.n_sets, outname=self.outname)
+
+    def export(self, outdir=".", logics=None, sets=True, output="files", sort_output=True):
+        """Write petal files (all, or only passed logics) and set files like `venn()` does"""
+        os.makedirs(outdir, exist_ok=True)
+        with open_output(outdir, self.outname, output) as petal_output:
+            with stage("write_petals"):
+                for logic, outname_final in self.names_out().items():
+                    if (logics is None) or (logic in logics):
+                        petal_output.write(outname_final, self.iter_petal(logic), sort_output=sort_output)
+            if sets:
+                with stage("write_sets"):
+                    for i, (a, x) in enumerate(zip("ABCDEF", self.dataset_labels)):
+                        outname_final = self.outname + "set.%s.%s.txt" % (a, x)
+                        petal_output.write(outname_final, self.iter_dataset(i), sort_output=sort_output, end="\n")
+        return self
@@ -0,0 +1,125 @@
+from ._compute import compute_membership
+from ._sketch import splitmix64_array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import os
+
+# shards of the datasets of the current call, set in each worker of that call's pool (never in the parent):
+SHARD_STATE = {"shards": None, "engine": None}
+
+def get_fork_context():
+    """Multiprocessing context that forks workers, or None where fork is not available"""
+    try:
+        return get_context("fork")
+    except ValueError:
+        return None
+
+def resolve_workers(workers):
+    """Number of shards to use; None means one per CPU"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be a positive integer or None")
+    return workers
+
+def get_shard_keys(dataset):
+    """Stable per-element hash of an array; equal elements get equal keys in every dataset"""
+    from numpy import fromiter, uint64
+    if dataset.dtype.kind in "iub":
+        return splitmix64_array(dataset)
+    else:
+        # hashes of floats agree with hashes of equal ints, and str hashes are inherited through fork:
+        return fromiter((hash(value) & 0xFFFFFFFFFFFFFFFF for value in dataset.tolist()), dtype=uint64, count=len(dataset))
+
+def split_array(dataset, n_shards):
+    """Split array into n_shards parts by shard key in one vectorized pass"""
+    from numpy import arange, searchsorted, split, uint64
+    shard_ids = get_shard_keys(dataset) % uint64(n_shards)
+    order = shard_ids.argsort(kind="stable")
+    bounds = searchsorted(shard_ids[order], arange(1, n_shards, dtype=uint64))
+    return split(dataset[order], bounds)
+
+def split_iterable(dataset, n_shards):
+    """Bucket elements into n_shards lists by hash in one pass"""
+    buckets = [[] for _ in range(n_shards)]
+    for element in dataset:
+        buckets[hash(element) % n_shards].append(element)
+    return buckets
+
+def split_datasets(datasets, engine, n_shards):
+    """Assign every element of every dataset to its shard once; returns per-shard lists of dataset parts"""
+    if engine == "numpy":
+        from ._vectorized import as_array
+        from numpy import result_type
+        arrays = [as_array(dataset) for dataset in datasets]
+        # cast to the common type first, so that shards agree with the serial universe:
+        dtype = result_type(*([array for array in arrays if len(array)] or arrays))
+        parts = [split_array(array.astype(dtype, copy=False), n_shards) for array in arrays]
+    else:
+        parts = [split_iterable(dataset, n_shards) for dataset in datasets]
+    return [[dataset_parts[shard] for dataset_parts in parts] for shard in range(n_shards)]
+
+def init_shard_worker(shards, engine):
+    """Keep shards of one call in a worker; with fork, initargs are inherited rather than pickled"""
+    SHARD_STATE["shards"], SHARD_STATE["engine"] = shards, engine
+
+def run_shard(task):
+    """Compute petal counts or petals of the elements of one shard"""
+    shard, petals_wanted = task
+    datasets = SHARD_STATE["shards"][shard]
+    n_sets = len(datasets)
+    if SHARD_STATE["engine"] == "numpy":
+        from ._vectorized import compute_masks, count_masks, group_by_mask
+        universe, masks = compute_masks(datasets)
+        if petals_wanted:
+            return group_by_mask(universe, masks)
+        else:
+            return count_masks(masks, n_sets).tolist()
+    membership = compute_membership(datasets)
+    if petals_wanted:
+        petals = defaultdict(set)
+        for element, mask in membership.items():
+            petals[mask].add(element)
+        return dict(petals)
+    else:
+        petal_counts = [0] * 2**n_sets
+        for mask in membership.values():
+            petal_counts[mask] += 1
+        return petal_counts
+
+def map_shards(datasets, engine, n_shards, petals_wanted):
+    """Split datasets into shards, then run `run_shard()` for every shard over a forked process pool of its own"""
+    # every call hands its shards to its own pool, so concurrent calls (e.g. from threads) cannot see each other's data:
+    shards = split_datasets(datasets, engine, n_shards)
+    tasks = [(shard, petals_wanted) for shard in range(n_shards)]
+    with ProcessPoolExecutor(
+        max_workers=n_shards, mp_context=get_fork_context(),
+        initializer=init_shard_worker, initargs=(shards, engine),
+    ) as executor:
+        return list(executor.map(run_shard, tasks))
+
+def compute_petal_counts_sharded(datasets, engine, workers=None):
+    """Hash-shard elements over worker processes and add up per-shard petal counts"""
+    n_sets = len(datasets)
+    petal_counts = [0] * 2**n_sets
+    for shard_counts in map_shards(datasets, engine, resolve_workers(workers), petals_wanted=False):
+        for mask, count in enumerate(shard_counts):
+            petal_counts[mask] += count
+    return petal_counts
+
+def partition_datasets_sharded(datasets, engine, workers=None):
+    """Hash-shard elements over worker processes and merge per-shard petals (same result as serial partitioning)"""
+    shard_petals = map_shards(datasets, engine, resolve_workers(workers), petals_wanted=True)
+    if engine == "numpy":
+        from numpy import concatenate, sort
+        masks = sorted(set().union(*shard_petals))
+        return {
+            mask: sort(concatenate([petals[mask] for petals in shard_petals if mask in petals])).tolist()
+            for mask in masks
+        }
+    petals = defaultdict(set)
+    for shard in shard_petals:
+        for mask, petal_set in shard.items():
+            petals[mask] |= petal_set
+    return petals
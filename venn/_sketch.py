@@ -0,0 +1,138 @@
+from hashlib import blake2b
+from heapq import heappush, heapreplace
+from math import ceil
+from numbers import Real
+from operator import index
+from struct import pack, unpack_from, calcsize
+
+MASK64 = 2**64 - 1
+SKETCH_HEADER = "<4sII"
+SKETCH_MAGIC = b"KMV1"
+
+def splitmix64(x):
+    """Mix 64-bit integer (finalizer of the SplitMix64 generator)"""
+    z = (x + 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+def splitmix64_array(values):
+    """Vectorized `splitmix64()` over a NumPy array of integers"""
+    from numpy import uint64, errstate
+    z = values.astype(uint64) + uint64(0x9E3779B97F4A7C15)
+    with errstate(over="ignore"):
+        z = (z ^ (z >> uint64(30))) * uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> uint64(27))) * uint64(0x94D049BB133111EB)
+    return z ^ (z >> uint64(31))
+
+def hash64(element):
+    """Stable 64-bit hash of an element (same in every process and on every node)"""
+    # integers of any type (and floats equal to them, like in a Python set) agree with `splitmix64_array()`,
+    # other real numbers are hashed by their float value, so Python and NumPy types agree as well:
+    if hasattr(element, "__index__"):
+        return splitmix64(index(element) & MASK64)
+    elif isinstance(element, Real):
+        value = float(element)
+        if value.is_integer():
+            return splitmix64(int(value) & MASK64)
+        data = pack("<d", value)
+    elif isinstance(element, bytes):
+        data = element
+    elif isinstance(element, str):
+        data = element.encode()
+    else:
+        data = repr(element).encode()
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), "little")
+
+def k_for_error(error):
+    """Sketch size for given relative standard error of the cardinality estimate"""
+    if not (0 < error < 1):
+        raise ValueError("error must be between 0 and 1")
+    return ceil(1 / error**2) + 2
+
+class KMVSketch:
+    """K minimum values (bottom-k) sketch of a set: mergeable, serializable cardinality estimator"""
+
+    def __init__(self, k=None, error=.01):
+        self.k = k or k_for_error(error)
+        self.heap, self.hashes = [], set()
+
+    def add_hash(self, h):
+        if h in self.hashes:
+            return
+        elif len(self.heap) < self.k:
+            heappush(self.heap, -h)
+            self.hashes.add(h)
+        elif h < -self.heap[0]:
+            self.hashes.discard(-heapreplace(self.heap, -h))
+            self.hashes.add(h)
+
+    def update(self, elements):
+        """Add elements; integer NumPy arrays are hashed in a vectorized way"""
+        if hasattr(elements, "dtype") and (elements.dtype.kind in "iub"):
+            from numpy import unique
+            hashes = unique(splitmix64_array(elements.ravel()))
+            for h in hashes[:self.k].tolist():
+                self.add_hash(h)
+        else:
+            for element in elements:
+                self.add_hash(hash64(element))
+        return self
+
+    def merge(self, other):
+        """Absorb another sketch (e.g. of another shard of the same dataset)"""
+        for h in other.hashes:
+            self.add_hash(h)
+        return self
+
+    def __len__(self):
+        return len(self.hashes)
+
+    @property
+    def threshold(self):
+        """Largest retained hash, or None if the sketch holds every element it has seen"""
+        return -self.heap[0] if len(self.heap) >= self.k else None
+
+    def estimate(self):
+        """Estimated number of distinct elements"""
+        if self.threshold is None:
+            return len(self.hashes)
+        else:
+            return (self.k - 1) * 2**64 / (self.threshold + 1)
+
+    def to_bytes(self):
+        hashes = sorted(self.hashes)
+        return pack(SKETCH_HEADER, SKETCH_MAGIC, self.k, len(hashes)) + pack("<%dQ" % len(hashes), *hashes)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, k, n_hashes = unpack_from(SKETCH_HEADER, data)
+        if magic != SKETCH_MAGIC:
+            raise ValueError("Not a serialized KMVSketch")
+        sketch = cls(k=k)
+        for h in unpack_from("<%dQ" % n_hashes, data, calcsize(SKETCH_HEADER)):
+            sketch.add_hash(h)
+        return sketch
+
+def sketch_datasets(data, error=.01, k=None):
+    """Sketch every dataset of a dictionary of sets or arrays"""
+    return {name: KMVSketch(k=k, error=error).update(dataset) for name, dataset in data.items()}
+
+def estimate_petal_counts(sketches):
+    """Estimate size of every petal by sampling membership masks of the k smallest hashes of the union"""
+    sketches = list(sketches)
+    n_sets = len(sketches)
+    union = KMVSketch(k=min(sketch.k for sketch in sketches))
+    for sketch in sketches:
+        union.merge(sketch)
+    # every hash below the union's threshold is below each sketch's own threshold,
+    # so its presence in a sketch tells exactly whether the element is in that set:
+    sample_counts = [0] * 2**n_sets
+    for h in union.hashes:
+        mask = 0
+        for i, sketch in enumerate(sketches):
+            if h in sketch.hashes:
+                mask |= 1 << (n_sets - 1 - i)
+        sample_counts[mask] += 1
+    scale = union.estimate() / max(len(union), 1)
+    return [round(c * scale) for c in sample_counts]
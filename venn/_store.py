@@ -0,0 +1,119 @@
+from array import array
+from collections.abc import Mapping
+
+ID_TYPECODE = "I" if array("I").itemsize >= 4 else "L"
+
+def new_mask_array(n_sets, length):
+    """Zeroed membership masks of `length` elements; one byte per element for up to 8 sets"""
+    if n_sets <= 8:
+        return bytearray(length)
+    elif n_sets <= 64:
+        return array("Q", bytes(8 * length))
+    else:
+        return [0] * length
+
+class ElementStore:
+    """Every distinct element interned once under an integer ID; datasets are kept as arrays of IDs"""
+
+    def __init__(self):
+        self.elements, self.ids = [], {}
+
+    def __len__(self):
+        return len(self.elements)
+
+    def encode(self, dataset):
+        """Array of IDs of the elements of a dataset, interning elements not seen before"""
+        ids, elements = self.ids, self.elements
+        encoded = array(ID_TYPECODE)
+        for element in dataset:
+            element_id = ids.get(element)
+            if element_id is None:
+                element_id = ids[element] = len(elements)
+                elements.append(element)
+            encoded.append(element_id)
+        return encoded
+
+    def freeze(self):
+        """Drop the interning table once all datasets are encoded; IDs can still be decoded"""
+        self.ids = None
+        return self
+
+    def decode(self, ids):
+        """Original elements of IDs, produced lazily"""
+        elements = self.elements
+        return (elements[element_id] for element_id in ids)
+
+def compute_id_masks(id_arrays, n_ids):
+    """Membership bitmask of every element ID (bit order matches logics)"""
+    n_sets = len(id_arrays)
+    masks = new_mask_array(n_sets, n_ids)
+    for i, ids in enumerate(id_arrays):
+        bit = 1 << (n_sets - 1 - i)
+        for element_id in ids:
+            masks[element_id] |= bit
+    return masks
+
+def iter_member_ids(id_arrays, masks):
+    """IDs of elements of any dataset, each once (from the first dataset that has it)"""
+    n_sets = len(id_arrays)
+    for i, ids in enumerate(id_arrays):
+        bit = 1 << (n_sets - 1 - i)
+        for element_id in ids:
+            # no bit of an earlier dataset is set:
+            if masks[element_id] < 2 * bit:
+                yield element_id
+
+class PetalView:
+    """Members of one petal: sized like a set, decoded only when iterated over"""
+    __slots__ = ("elements", "ids")
+
+    def __init__(self, elements, ids):
+        self.elements, self.ids = elements, ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        elements = self.elements
+        return (elements[element_id] for element_id in self.ids)
+
+class PetalIndex(Mapping):
+    """Element IDs ordered by membership mask, CSR-style: petal of mask m is `order[offsets[m]:offsets[m+1]]`"""
+
+    def __init__(self, elements, masks, n_sets, ids=None):
+        # ids: IDs with non-zero masks, each once, if the element table is larger than these datasets (default: all IDs)
+        if isinstance(masks, bytearray):
+            counts = [0] + [masks.count(mask) for mask in range(1, 2**n_sets)]
+        else:
+            if ids is not None:
+                ids = array(ID_TYPECODE, ids)
+            counts = [0] * 2**n_sets
+            for mask in (masks if ids is None else (masks[element_id] for element_id in ids)):
+                counts[mask] += 1
+            counts[0] = 0
+        self.offsets = [0]
+        for count in counts:
+            self.offsets.append(self.offsets[-1] + count)
+        # counting sort keeps IDs in the order they are passed (ascending by default) within every petal:
+        self.order = array(ID_TYPECODE, bytes(array(ID_TYPECODE).itemsize * self.offsets[-1]))
+        positions = self.offsets[:-1]
+        pairs = enumerate(masks) if ids is None else ((element_id, masks[element_id]) for element_id in ids)
+        for element_id, mask in pairs:
+            self.order[positions[mask]] = element_id
+            positions[mask] += 1
+        self.elements = elements
+
+    def counts(self):
+        """Petal sizes indexed by membership mask"""
+        return [end - start for start, end in zip(self.offsets, self.offsets[1:])]
+
+    def __getitem__(self, mask):
+        if not (0 < mask < len(self.offsets) - 1) or (self.offsets[mask] == self.offsets[mask+1]):
+            raise KeyError(mask)
+        return PetalView(self.elements, memoryview(self.order)[self.offsets[mask]:self.offsets[mask+1]])
+
+    def __iter__(self):
+        return (mask for mask, count in enumerate(self.counts()) if mask and count)
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,237 @@
+from ._constants import SHAPE_COORDS, SHAPE_DIMS, SHAPE_ANGLES
+from ._constants import PETAL_LABEL_COORDS, PSEUDOVENN_PETAL_COORDS
+from ._compute import is_valid_dataset_dict, compute_petal_counts
+from ._compute import compute_dataset_sizes, format_petal_labels, generate_petal_filenames, compute_hidden_counts
+from html import escape
+from math import pi, sin, cos
+import os
+
+PX_PER_INCH = 72
+
+VIRIDIS_STOPS = [
+    "#440154", "#472d7b", "#3b528b", "#2c728e", "#21918c",
+    "#28ae80", "#5ec962", "#addc30", "#fde725"
+]
+
+BASE_COLORS = {
+    "b": "#0000ff", "g": "#008000", "r": "#ff0000", "c": "#00bfbf",
+    "m": "#bf00bf", "y": "#bfbf00", "k": "#000000", "w": "#ffffff"
+}
+
+def hex_to_rgb(color):
+    """Convert '#rrggbb' to a tuple of floats"""
+    return tuple(int(color[i:i+2], 16) / 255 for i in (1, 3, 5))
+
+def interpolate_stops(stops, value):
+    """Linearly interpolate color at value in [0, 1] between evenly spaced stops"""
+    position = value * (len(stops) - 1)
+    i = min(int(position), len(stops) - 2)
+    left, right = hex_to_rgb(stops[i]), hex_to_rgb(stops[i+1])
+    return tuple(a + (b - a) * (position - i) for a, b in zip(left, right))
+
+def resolve_svg_color(color):
+    """Css color of a matplotlib color spec; specs that are not base colors, css names or '#rgb'/'#rrggbb' ('C0', 'tab:blue', '0.5') go through matplotlib"""
+    if not isinstance(color, str):
+        return tuple(color[:3])
+    elif color in BASE_COLORS:
+        return BASE_COLORS[color]
+    elif (color.startswith("#") and (len(color) in {4, 7})) or color.isalpha():
+        return color
+    else:
+        from matplotlib.colors import to_rgb
+        return to_rgb(color)
+
+def generate_svg_colors(cmap="viridis", n_colors=6, alpha=.4):
+    """Generate (css color, opacity) pairs, only importing matplotlib when needed; mirrors `generate_colors()`"""
+    if not isinstance(n_colors, int) or (n_colors < 2) or (n_colors > 6):
+        raise ValueError("n_colors must be an integer between 2 and 6")
+    if isinstance(cmap, list):
+        colors = [(resolve_svg_color(color), alpha) for color in cmap]
+    elif cmap == "viridis":
+        colors = [
+            (interpolate_stops(VIRIDIS_STOPS, i / (n_colors - 1)), alpha)
+            for i in range(n_colors)
+        ]
+    else:
+        # other colormaps are only known to matplotlib:
+        from ._venn import generate_colors
+        colors = [
+            (tuple(color[:3]), color[3])
+            for color in generate_colors(cmap=cmap, n_colors=n_colors, alpha=alpha)
+        ]
+    return colors[:n_colors]
+
+def css_color(color):
+    """Format color (css string or tuple of floats) for svg attributes"""
+    if isinstance(color, str):
+        return color
+    else:
+        return "rgb({},{},{})".format(*(round(255 * c) for c in color[:3]))
+
+def shape_style(color):
+    """Fill and edge attributes for a shape; edge is less transparent, like `less_transparent_color()`"""
+    fill, opacity = color
+    return 'fill="{0}" fill-opacity="{1:.3f}" stroke="{0}" stroke-opacity="{2:.3f}"'.format(
+        css_color(fill), opacity, (1 + opacity) / 2
+    )
+
+class SVGCanvas:
+    """Collects svg elements in data coordinates of the matplotlib axes (y axis pointing up)"""
+
+    def __init__(self, figsize, xlim=(-.05, 1.05), ylim=(-.05, 1.05)):
+        self.xlim, self.ylim = xlim, ylim
+        self.scale = PX_PER_INCH * figsize[1] / (ylim[1] - ylim[0])
+        self.elements = []
+
+    def x(self, x):
+        return (x - self.xlim[0]) * self.scale
+
+    def y(self, y):
+        return (self.ylim[1] - y) * self.scale
+
+    def ellipse(self, x, y, w, h, a, color):
+        cx, cy = self.x(x), self.y(y)
+        self.elements.append(
+            '<ellipse cx="{:.2f}" cy="{:.2f}" rx="{:.2f}" ry="{:.2f}" transform="rotate({} {:.2f} {:.2f})" {}/>'.format(
+                cx, cy, w * self.scale / 2, h * self.scale / 2, -a, cx, cy,
+                shape_style(color)
+            )
+        )
+
+    def triangle(self, x1, y1, x2, y2, x3, y3, _dim, _angle, color):
+        points = " ".join(
+            "{:.2f},{:.2f}".format(self.x(x), self.y(y))
+            for x, y in ((x1, y1), (x2, y2), (x3, y3))
+        )
+        self.elements.append(
+            '<polygon points="{}" {}/>'.format(points, shape_style(color))
+        )
+
+    def text(self, x, y, text, fontsize, anchor="middle", filename=None):
+        lines = str(text).split("\n")
+        first_dy = -(len(lines) - 1) / 2 * 1.2
+        tspans = "".join(
+            '<tspan x="{:.2f}" dy="{:.2f}em">{}</tspan>'.format(
+                self.x(x), first_dy if i == 0 else 1.2, escape(line, quote=False)
+            )
+            for i, line in enumerate(lines)
+        )
+        element = (
+            '<text x="{:.2f}" y="{:.2f}" font-size="{}" text-anchor="{}" dominant-baseline="central">{}</text>'.format(
+                self.x(x), self.y(y), fontsize, anchor, tspans
+            )
+        )
+        if filename:
+            element = '<a href="{}">{}</a>'.format(escape(filename), element)
+        self.elements.append(element)
+
+    def legend_entry(self, x, y, text, color, fontsize, filename=None):
+        size = fontsize * 1.2
+        element = (
+            '<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" fill="{}" fill-opacity=".4"/>'.format(
+                self.x(x), self.y(y) - size / 2, size * 1.5, size, css_color(color[0])
+            )
+        )
+        if filename:
+            element = '<a href="{}">{}</a>'.format(escape(filename), element)
+        self.elements.append(element)
+        self.text(x + size * 1.8 / self.scale, y, text, fontsize, anchor="start", filename=filename)
+
+    def render(self, extra_width=0):
+        width = (self.xlim[1] - self.xlim[0]) * self.scale + extra_width
+        height = (self.ylim[1] - self.ylim[0]) * self.scale
+        return (
+            '<svg xmlns="http://www.w3.org/2000/svg" width="{0:.0f}" height="{1:.0f}" viewBox="0 0 {0:.2f} {1:.2f}" font-family="sans-serif">\n'.format(width, height) +
+            "\n".join(self.elements) + "\n</svg>\n"
+        )
+
+def draw_legend_svg(canvas, dataset_labels, dataset_sizes, colors, fontsize, outname, names_out, x0):
+    """Annotate dataset labels and sizes, link them to set files if petal files exist; return overhang width"""
+    max_length = 0
+    for a, i, x, l, c in zip("ABCDEF", range(len(dataset_labels)), dataset_labels, dataset_sizes, colors):
+        url_name = names_out and outname+"set.%s.%s.txt" % (a, x)
+        canvas.legend_entry(x0, 1-i*0.05, "%s(%s)" % (x, l), c, fontsize, filename=url_name)
+        max_length = max(max_length, len("%s(%s)" % (x, l)))
+    return fontsize * (.6 * max_length + 2)
+
+def draw_venn_svg(*, petal_labels, dataset_labels, colors, dataset_sizes, figsize=(8, 8), fontsize=13, legend_loc="upper right", names_out=None, outname="result_"):
+    """Render true Venn diagram as svg markup straight from the static geometry"""
+    n_sets = len(dataset_labels)
+    if not (2 <= n_sets <= 6):
+        raise ValueError("Number of sets must be between 2 and 6")
+    canvas = SVGCanvas(figsize)
+    draw_shape = canvas.ellipse if n_sets < 6 else canvas.triangle
+    shape_params = zip(
+        SHAPE_COORDS[n_sets], SHAPE_DIMS[n_sets], SHAPE_ANGLES[n_sets], colors
+    )
+    for coords, dims, angle, color in shape_params:
+        draw_shape(*coords, *dims, angle, color)
+    for logic, petal_label in petal_labels.items():
+        if logic in PETAL_LABEL_COORDS[n_sets]:
+            x, y = PETAL_LABEL_COORDS[n_sets][logic]
+            canvas.text(x, y, petal_label, fontsize, filename=names_out and names_out[logic])
+    extra_width = 0
+    if legend_loc is not None:
+        extra_width = draw_legend_svg(canvas, dataset_labels, dataset_sizes, colors, fontsize, outname, names_out, x0=.96)
+    return canvas.render(extra_width=extra_width)
+
+def draw_pseudovenn6_svg(*, petal_labels, dataset_labels, colors, dataset_sizes, hidden=None, figsize=(8, 8), fontsize=13, legend_loc="upper right", names_out=None, outname="result_"):
+    """Render intersection of 6 circles as svg markup; `hidden` holds per-set counts of undisplayed petals"""
+    if len(dataset_labels) != 6:
+        raise NotImplementedError("Pseudovenn implemented only for 6 sets")
+    if hidden is None:
+        canvas = SVGCanvas(figsize)
+    else:
+        canvas = SVGCanvas(figsize, xlim=(-.2, 1.05), ylim=(-.2, 1.05))
+    for step, color in zip(range(6), colors):
+        angle = (2 - step) * pi / 3
+        canvas.ellipse(.5 + .2 * cos(angle), .5 + .2 * sin(angle), .6, .6, 0, color)
+    for logic, petal_label in petal_labels.items():
+        if logic in PSEUDOVENN_PETAL_COORDS[6]:
+            x, y = PSEUDOVENN_PETAL_COORDS[6][logic]
+            canvas.text(x, y, petal_label, fontsize, filename=names_out and names_out[logic])
+    if hidden is not None:
+        for step, hidden_value in zip(range(6), hidden):
+            angle = (2 - step) * pi / 3
+            x = .5 + .57 * cos(angle)
+            y = .5 + .57 * sin(angle)
+            canvas.text(x, y, "{}\n n/d*".format(hidden_value), fontsize)
+        example_labels = list(dataset_labels)[0], list(dataset_labels)[3]
+        hint_text = (
+            "* elements of set in intersections that are not displayed,\n" +
+            "such as shared only between {} and {}".format(*example_labels)
+        )
+        canvas.text(.5, -.1, hint_text, fontsize)
+    extra_width = 0
+    if legend_loc is not None:
+        extra_width = draw_legend_svg(canvas, dataset_labels, dataset_sizes, colors, fontsize, outname, names_out, x0=.9)
+    return canvas.render(extra_width=extra_width)
+
+def write_svg(svg, outdir=".", outname="result_", html=True):
+    """Write svg markup and, optionally, the html page embedding it"""
+    os.makedirs(outdir, exist_ok=True)
+    with open(os.path.join(outdir, outname + "venn.svg"), "w") as handle:
+        handle.write(svg)
+    if html:
+        with open(os.path.join(outdir, outname + "venn.html"), "w") as fo_tmp:
+            fo_tmp.write(
+                '<embed src="'+f'{outname}venn.svg'+'" type="image/svg+xml" />')
+
+def venn_svg(data, fmt="{size}", hint_hidden=False, cmap="viridis", alpha=.4, figsize=(8, 8), fontsize=13, legend_loc="upper right", pseudovenn=False, links=False, outname="result_", engine="auto"):
+    """Compute petal counts and render venn (or pseudovenn) diagram as svg markup, without matplotlib"""
+    if not is_valid_dataset_dict(data):
+        raise TypeError("Only dictionaries of sets or arrays are understood")
+    petal_counts = compute_petal_counts(data.values(), engine=engine)
+    params = dict(
+        petal_labels=format_petal_labels(petal_counts, fmt=fmt),
+        dataset_labels=list(data.keys()),
+        dataset_sizes=compute_dataset_sizes(petal_counts),
+        colors=generate_svg_colors(cmap=cmap, n_colors=len(data), alpha=alpha),
+        figsize=figsize, fontsize=fontsize, legend_loc=legend_loc, outname=outname,
+        names_out=generate_petal_filenames(len(data), outname) if links else None,
+    )
+    if pseudovenn:
+        hidden = compute_hidden_counts(petal_counts) if hint_hidden else None
+        return draw_pseudovenn6_svg(hidden=hidden, **params)
+    else:
+        return draw_venn_svg(**params)
@@ -0,0 +1,86 @@
+from ._venn import FIGURE_FORMATS, get_colors, less_transparent_color, save_figure
+from ._compute import is_valid_dataset_dict, count_observed_masks, rank_intersections
+from ._profile import stage, profiled
+from matplotlib.pyplot import subplots
+import os
+
+def init_upset_axes(figsize):
+    """Create axes for intersection sizes (top) and membership matrix (bottom)"""
+    _, (bar_ax, matrix_ax) = subplots(
+        nrows=2, ncols=1, figsize=figsize, sharex=True,
+        gridspec_kw=dict(height_ratios=(3, 2), hspace=.05),
+    )
+    for ax in bar_ax, matrix_ax:
+        for side in "top", "right", "bottom":
+            ax.spines[side].set_visible(False)
+    matrix_ax.spines["left"].set_visible(False)
+    matrix_ax.tick_params(axis="both", length=0)
+    return bar_ax, matrix_ax
+
+def draw_upset(*, petal_labels, petal_sizes, dataset_labels, dataset_sizes, colors, figsize, fontsize, outname, outdir, formats=FIGURE_FORMATS):
+    """Draw UpSet plot: bars of intersection sizes over a matrix of member sets, in order of petal_labels"""
+    n_sets = len(dataset_labels)
+    logics = list(petal_labels)
+    with stage("draw"):
+        bar_ax, matrix_ax = init_upset_axes(figsize)
+        positions = range(len(logics))
+        bar_ax.bar(positions, [petal_sizes[logic] for logic in logics], color="0.3", width=.6)
+        for x, logic in zip(positions, logics):
+            bar_ax.text(
+                x, petal_sizes[logic], petal_labels[logic], fontsize=fontsize,
+                horizontalalignment="center", verticalalignment="bottom",
+            )
+        bar_ax.set(ylabel="Intersection size", xticks=[])
+        for x, logic in zip(positions, logics):
+            rows = [i for i, bit in enumerate(logic) if bit == "1"]
+            matrix_ax.plot([x, x], [min(rows), max(rows)], color="0.3", zorder=1)
+        for i, color in enumerate(colors):
+            matrix_ax.scatter(
+                positions, [i] * len(logics), zorder=2, s=fontsize*6,
+                color=[less_transparent_color(color) if logic[i] == "1" else "0.9" for logic in logics],
+            )
+        matrix_ax.set(
+            ylim=(n_sets-.5, -.5), xlim=(-.5, len(logics)-.5),
+            yticks=range(n_sets), xticks=[],
+        )
+        matrix_ax.set_yticklabels(
+            ["%s(%s)" % (x, l) for x, l in zip(dataset_labels, dataset_sizes)],
+            fontsize=fontsize,
+        )
+    save_figure(bar_ax.figure, outdir, outname, formats=formats, kind="upset")
+    return (bar_ax, matrix_ax), outname
+
+@profiled
+def upset(data, top_k=20, min_size=1, fmt="{size}", cmap="viridis", alpha=.4, figsize=None, fontsize=10, outdir=".", engine="auto", formats=FIGURE_FORMATS):
+    """Check input, count observed intersections of any number of sets, draw the top_k largest as an UpSet plot"""
+    if not is_valid_dataset_dict(data):
+        raise TypeError("Only dictionaries of sets or arrays are understood")
+    n_sets = len(data)
+    if n_sets < 2:
+        raise ValueError("Number of sets must be at least 2")
+    os.makedirs(outdir, exist_ok=True)
+    with stage("partition"):
+        mask_counts = count_observed_masks(data.values(), engine=engine)
+    universe_size = sum(mask_counts.values())
+    dataset_sizes = [
+        sum(c for mask, c in mask_counts.items() if (mask >> (n_sets-1-i)) & 1)
+        for i in range(n_sets)
+    ]
+    petal_sizes, petal_labels = {}, {}
+    for mask in rank_intersections(mask_counts, top_k=top_k, min_size=min_size):
+        logic = bin(mask)[2:].zfill(n_sets)
+        petal_sizes[logic] = mask_counts[mask]
+        petal_labels[logic] = fmt.format(
+            logic=logic, size=mask_counts[mask],
+            percentage=(100*mask_counts[mask]/max(universe_size, 1))
+        )
+    if figsize is None:
+        # grow with the number of bars and matrix rows:
+        figsize = (max(6, 2+.4*len(petal_labels)), 4+.25*n_sets)
+    return draw_upset(
+        petal_labels=petal_labels, petal_sizes=petal_sizes,
+        dataset_labels=list(data.keys()), dataset_sizes=dataset_sizes,
+        colors=get_colors(n_colors=n_sets, cmap=cmap, alpha=alpha),
+        figsize=figsize, fontsize=fontsize,
+        outname="result_", outdir=outdir, formats=formats,
+    )
@@ -0,0 +1,62 @@
+from numpy import ndarray, array, asarray, unique, concatenate, split, cumsum
+from numpy import result_type
+from numpy import zeros, bincount, argsort, searchsorted
+from numpy import uint8, uint16, uint32, uint64
+
+def as_array(dataset):
+    """Convert set or sequence to a flat NumPy array; arrays are passed through"""
+    if isinstance(dataset, ndarray):
+        return dataset.ravel()
+    else:
+        return array(list(dataset))
+
+def mask_dtype(n_sets):
+    """Smallest unsigned integer type that fits a membership mask of n_sets bits"""
+    for dtype, n_bits in (uint8, 8), (uint16, 16), (uint32, 32), (uint64, 64):
+        if n_sets <= n_bits:
+            return dtype
+    raise ValueError("Too many sets for a vectorized membership mask")
+
+def encode_datasets(datasets):
+    """Dictionary-encode elements: return sorted universe and per-dataset integer codes into it"""
+    arrays = [unique(as_array(dataset)) for dataset in datasets]
+    non_empty = [arr for arr in arrays if len(arr)] or arrays
+    dtype = result_type(*non_empty)
+    universe, inverse = unique(
+        concatenate([arr.astype(dtype, copy=False) for arr in arrays]),
+        return_inverse=True,
+    )
+    lengths = [len(arr) for arr in arrays]
+    codes = split(inverse.ravel(), cumsum(lengths)[:-1])
+    return universe, codes
+
+def compute_masks(datasets):
+    """Compute membership bitmask of every element in the universe (bit order matches logics)"""
+    datasets = list(datasets)
+    n_sets = len(datasets)
+    universe, codes = encode_datasets(datasets)
+    masks = zeros(len(universe), dtype=mask_dtype(n_sets))
+    for i, dataset_codes in enumerate(codes):
+        masks[dataset_codes] |= 1 << (n_sets - 1 - i)
+    return universe, masks
+
+def count_masks(masks, n_sets):
+    """Petal sizes indexed by membership mask"""
+    return bincount(asarray(masks, dtype=int), minlength=2**n_sets)
+
+def group_by_mask(universe, masks):
+    """Split universe into arrays of elements sharing a membership bitmask (sorted if universe is)"""
+    order = argsort(masks, kind="stable")
+    sorted_masks, sorted_universe = masks[order], universe[order]
+    present = unique(sorted_masks)
+    starts = searchsorted(sorted_masks, present, side="left")
+    ends = searchsorted(sorted_masks, present, side="right")
+    return {
+        int(mask): sorted_universe[start:end]
+        for mask, start, end in zip(present, starts, ends)
+    }
+
+def partition_arrays(datasets):
+    """Group elements by membership bitmask; petals are sorted lists of Python scalars"""
+    universe, masks = compute_masks(datasets)
+    return {mask: petal.tolist() for mask, petal in group_by_mask(universe, masks).items()}
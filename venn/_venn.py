@@ -1,18 +1,42 @@
-from matplotlib import pyplot as plt
+from ._backend import use_headless_backend
+use_headless_backend()
+
 from matplotlib.pyplot import subplots
 from matplotlib.patches import Ellipse, Polygon
 from matplotlib.colors import to_rgba
 from matplotlib.cm import ScalarMappable
+from matplotlib import rcParams
+from matplotlib.figure import Figure
 from ._constants import SHAPE_COORDS, SHAPE_DIMS, SHAPE_ANGLES
 from ._constants import PETAL_LABEL_COORDS, PSEUDOVENN_PETAL_COORDS
+from ._compute import resolve_engine, is_valid_dataset_dict
+from ._compute import compute_petal_counts, compute_dataset_sizes
+from ._compute import format_petal_labels, write_petal_files, compute_hidden_counts
+from ._result import VennResult
+from ._cache import ResultCache, get_cache_key
+from ._profile import stage, profiled
+from ._output import OUTPUT_KINDS, open_output, get_link_prefix, get_bundle_name, get_bundle_index_name
 from math import pi, sin, cos
 from functools import partial
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pickle import dumps, loads
+from io import BytesIO
 import os
 
+FIGURE_FORMATS = ("pdf", "png", "svg", "html")
+
+FIGURE_TEMPLATES = {}
+
+EXPORT_POOLS = {}
+
 def generate_colors(cmap="viridis", n_colors=6, alpha=.4):
     """Generate colors from matplotlib colormap; pass list to use exact colors"""
     if not isinstance(n_colors, int) or (n_colors < 2) or (n_colors > 6):
         raise ValueError("n_colors must be an integer between 2 and 6")
+    return get_colors(cmap=cmap, n_colors=n_colors, alpha=alpha)
+
+def get_colors(cmap="viridis", n_colors=6, alpha=.4):
+    """Generate any number of colors from matplotlib colormap; pass list to use exact colors"""
     if isinstance(cmap, list):
         colors = [to_rgba(color, alpha=alpha) for color in cmap]
     else:
@@ -46,69 +70,18 @@ def draw_triangle(ax, x1, y1, x2, y2, x3, y3, _dim, _angle, color):
 def draw_text(ax, x, y, text, fontsize, color="black", filename=None):
     """Wrapper for drawing text"""
     if not filename:
-        ax.text(
+        return ax.text(
             x, y, text, fontsize=fontsize, color=color,
             horizontalalignment="center", verticalalignment="center",
         )
     else:
-        ax.text(
+        return ax.text(
             x, y, text, fontsize=fontsize, color=color,
             horizontalalignment="center", verticalalignment="center",
             url=filename,
             bbox=dict(url=filename, alpha=0.001)
         )
 
-def generate_logics(n_sets):
-    """Generate intersection identifiers in binary (0010 etc)"""
-    for i in range(1, 2**n_sets):
-        yield bin(i)[2:].zfill(n_sets)
-
-def generate_petal_labels(datasets, fmt="{size}", outname="out", outdir="."):
-    """Generate petal descriptions for venn diagram based on set sizes"""
-    # print(outname, datasets)
-    datasets = list(datasets)
-    n_sets = len(datasets)
-    dataset_union = set.union(*datasets)
-    universe_size = len(dataset_union)
-    petal_labels = {}
-    datas = {}
-    for logic in generate_logics(n_sets):
-        included_sets = [
-            datasets[i] for i in range(n_sets) if logic[i] == "1"
-        ]
-        excluded_sets = [
-            datasets[i] for i in range(n_sets) if logic[i] == "0"
-        ]
-        petal_set = (
-            (dataset_union & set.intersection(*included_sets)) -
-            set.union(set(), *excluded_sets)
-        )
-        petal_labels[logic] = fmt.format(
-            logic=logic, size=len(petal_set),
-            percentage=(100*len(petal_set)/max(universe_size, 1))
-        )
-        name = ''.join([y for x, y in zip(logic, "ABCDEF") if int(x)])
-        datas[(logic, name)] = petal_set
-    names = dict(zip(
-        sorted([x[1] for x in sorted(datas, key=lambda x:x[1])],key=len),
-        range(1, len(datas)+1)
-    ))
-    # print("names:", names)
-    names_out = {}
-    for x in datas:
-        logic, name = x
-        outname_final = "%s%02d%s.txt" % (
-                  outname, names[name], name)
-        names_out[logic] = outname_final
-        print(*sorted(datas[x]), sep="\n", end="",
-              file=open(os.path.join(outdir, outname_final), "w"))
-    # print(logic, petal_set)
-    # print("----")
-    # print("datas:", datas)
-    # print("names_out:", names_out)
-    # print("petal_labels:", petal_labels)
-    return petal_labels, names_out
-
 def init_axes(ax, figsize):
     """Create axes if do not exist, set axes parameters"""
     if ax is None:
@@ -120,6 +93,69 @@ def init_axes(ax, figsize):
     )
     return ax
 
+class FigureTemplate:
+    """Axes with shapes drawn once; text artists are keyed and updated in place when the template is reused"""
+
+    def __init__(self, ax):
+        self.ax, self.fresh = ax, True
+        self.artists, self.drawn = {}, set()
+
+    def begin(self):
+        self.drawn = set()
+        return self
+
+    def end(self):
+        """Hide artists that were not drawn in this round"""
+        for key, artist in self.artists.items():
+            artist.set_visible(key in self.drawn)
+
+    def place(self, key, create, text, fontsize, url):
+        """Reuse artist stored under key, updating its text and links, or create it"""
+        artist = self.artists.get(key)
+        if (artist is not None) and (bool(artist.get_url()) != bool(url)):
+            artist.remove()
+            artist = None
+        if artist is None:
+            artist = self.artists[key] = create()
+        else:
+            artist.set_text(text)
+            if fontsize is not None:
+                artist.set_fontsize(fontsize)
+            artist.set_url(url)
+            if artist.get_bbox_patch() is not None:
+                artist.get_bbox_patch().set_url(url)
+        self.drawn.add(key)
+        return artist
+
+    def text(self, key, x, y, text, fontsize, color="black", filename=None):
+        """Keyed `draw_text()`"""
+        create = partial(draw_text, self.ax, x, y, text, fontsize, color=color, filename=filename)
+        return self.place(key, create, text, fontsize, filename)
+
+    def annotate(self, key, text, xy, url, bbox, fontsize=None):
+        """Keyed `ax.annotate()` at fixed position"""
+        create = partial(self.ax.annotate, text, xy=xy, xytext=xy, url=url, bbox=bbox)
+        return self.place(key, create, text, fontsize, url)
+
+def new_figure_template(figsize):
+    """Template on a new figure that is not managed by pyplot"""
+    return FigureTemplate(init_axes(Figure(figsize=figsize).add_subplot(), figsize))
+
+def get_figure_template(ax, kind, n_sets, colors, figsize, reuse_figure=False):
+    """Fresh template on passed (or new) axes, or cached template per (kind, n_sets, colors, figsize) if reuse_figure"""
+    if isinstance(reuse_figure, FigureTemplate):
+        return reuse_figure
+    elif (ax is not None) or (not reuse_figure):
+        return FigureTemplate(init_axes(ax, figsize))
+    key = kind, n_sets, tuple(map(tuple, colors)), tuple(figsize)
+    if key not in FIGURE_TEMPLATES:
+        FIGURE_TEMPLATES[key] = new_figure_template(figsize)
+    return FIGURE_TEMPLATES[key]
+
+def clear_figure_templates():
+    """Drop cached figure templates"""
+    FIGURE_TEMPLATES.clear()
+
 def get_n_sets(petal_labels, dataset_labels):
     """Infer number of sets, check consistency"""
     n_sets = len(dataset_labels)
@@ -130,8 +166,83 @@ def get_n_sets(petal_labels, dataset_labels):
             raise KeyError("Key not understood: " + logic)
     return n_sets
 
-def draw_venn(*, petal_labels, dataset_labels, hint_hidden, colors, figsize, fontsize, legend_loc, ax, names_out, outname, data, outdir):
-    """Draw true Venn diagram, annotate petals and dataset labels"""
+def get_tight_bbox(figure, dpi):
+    """Tight bounding box laid out at export dpi and padded like `savefig(bbox_inches='tight')`"""
+    figure_dpi = figure.dpi
+    figure.dpi = dpi
+    try:
+        bbox_inches = figure.get_tightbbox()
+    finally:
+        figure.dpi = figure_dpi
+    return bbox_inches.padded(rcParams["savefig.pad_inches"])
+
+def savefig_pickled(payload, path, dpi, bbox_inches):
+    """Unpickle figure and save it; runs in a worker process"""
+    loads(payload).savefig(path, dpi=dpi, bbox_inches=bbox_inches)
+
+def get_figure_formats(formats):
+    """Requested figure formats; 'html' only embeds the svg, so 'svg' is always written with it"""
+    formats = tuple(formats)
+    if ("html" in formats) and ("svg" not in formats):
+        formats = formats[:formats.index("html")] + ("svg",) + formats[formats.index("html"):]
+    return formats
+
+def get_export_pool(workers):
+    """Process pool for parallel export: passed executor, or one long-lived pool per number of workers"""
+    if isinstance(workers, Executor):
+        return workers
+    if workers not in EXPORT_POOLS:
+        EXPORT_POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+    return EXPORT_POOLS[workers]
+
+def save_figure(figure, outdir, outname, formats=FIGURE_FORMATS, dpi=200, workers=1, kind="venn"):
+    """Save figure in requested formats, computing the tight bounding box only once; 'html' embeds the svg"""
+    # workers: number of processes (or an executor) to save formats in parallel; the figure is pickled to each
+    # of them, which only pays off for large figures with several slow formats (e.g. pdf and png at high dpi)
+    formats = get_figure_formats(formats)
+    if formats:
+        os.makedirs(outdir, exist_ok=True)
+    prefix = os.path.join(outdir, outname)
+    paths = [f"{prefix}{kind}.{fmt}" for fmt in formats if fmt != "html"]
+    if paths:
+        with stage("export.bbox"):
+            bbox_inches = get_tight_bbox(figure, dpi)
+        if (isinstance(workers, Executor) or (workers > 1)) and (len(paths) > 1):
+            with stage("export"):
+                payload = dumps(figure)
+                list(get_export_pool(workers).map(
+                    partial(savefig_pickled, payload, dpi=dpi, bbox_inches=bbox_inches),
+                    paths,
+                ))
+        else:
+            for path in paths:
+                with stage("export." + path.rsplit(".", 1)[1]):
+                    figure.savefig(path, dpi=dpi, bbox_inches=bbox_inches)
+    if "html" in formats:
+        with stage("export.html"), open(f"{prefix}{kind}.html", "w") as fo_tmp:
+            fo_tmp.write(
+                '<embed src="'+f'{outname}{kind}.svg'+'" type="image/svg+xml" />')
+
+def render_figure(figure, outname, formats=FIGURE_FORMATS, dpi=200, kind="venn"):
+    """Render figure into memory as {filename: bytes}, like `save_figure()` does on disk"""
+    formats = get_figure_formats(formats)
+    files = {}
+    image_formats = [fmt for fmt in formats if fmt != "html"]
+    if image_formats:
+        with stage("export.bbox"):
+            bbox_inches = get_tight_bbox(figure, dpi)
+        for fmt in image_formats:
+            with stage("export." + fmt):
+                buffer = BytesIO()
+                figure.savefig(buffer, format=fmt, dpi=dpi, bbox_inches=bbox_inches)
+                files[f"{outname}{kind}.{fmt}"] = buffer.getvalue()
+    if "html" in formats:
+        files[f"{outname}{kind}.html"] = (
+            '<embed src="'+f'{outname}{kind}.svg'+'" type="image/svg+xml" />').encode()
+    return files
+
+def draw_venn(*, petal_labels, dataset_labels, hint_hidden, colors, figsize, fontsize, legend_loc, ax, names_out, outname, data, outdir, dataset_sizes=None, formats=FIGURE_FORMATS, export_workers=1, reuse_figure=False, link_prefix="", petal_counts=None):
+    """Draw true Venn diagram, annotate petals and dataset labels; petal_counts (indexed by mask) spare recounting"""
     n_sets = get_n_sets(petal_labels, dataset_labels)
     if 2 <= n_sets < 6:
         draw_shape = draw_ellipse
@@ -139,40 +250,43 @@ def draw_venn(*, petal_labels, dataset_labels, hint_hidden, colors, figsize, fon
         draw_shape = draw_triangle
     else:
         raise ValueError("Number of sets must be between 2 and 6")
-    ax = init_axes(ax, figsize)
-    shape_params = zip(
-        SHAPE_COORDS[n_sets], SHAPE_DIMS[n_sets], SHAPE_ANGLES[n_sets], colors
-    )
-    for coords, dims, angle, color in shape_params:
-        draw_shape(ax, *coords, *dims, angle, color)
-    for logic, petal_label in petal_labels.items():
-        # some petals could have been modified manually:
-        if logic in PETAL_LABEL_COORDS[n_sets]:
-            x, y = PETAL_LABEL_COORDS[n_sets][logic]
-            draw_text(ax, x, y, petal_label, fontsize=fontsize, filename=names_out[logic])
-    if legend_loc is not None:
-        # dataset_labels = {r"Hyperlink: \url{http://google.com}"}
-        # ax.legend(dataset_labels, loc=legend_loc, prop={"size": fontsize})
-        # print(dataset_labels, legend_loc)
-        for a, i, x, l, c in zip("ABCDEF", range(len(dataset_labels)), dataset_labels, [len(x) for x in data.values()], colors):
-            annoloc1 = (0.96, 1-i*0.05)
-            annoloc2 = (1, 1-i*0.05)
-            # print(colors)
-            url_name = outname+"set.%s.%s.txt" % (a, x)
-            ax.annotate("   ", xy=annoloc1,
-                        xytext=annoloc1,
-                        url=url_name,
-                        bbox=dict(color=c, alpha=.4, url=url_name))
-            ax.annotate("%s(%s)" % (x, l), xy=annoloc2,
-                        xytext=annoloc2,
-                        url=url_name,
-                        bbox=dict(color="w", alpha=.4, url=url_name))
-    plt.savefig(f'{os.path.join(outdir, outname)}venn.pdf', dpi=200, bbox_inches='tight')
-    plt.savefig(f'{os.path.join(outdir, outname)}venn.png', dpi=200, bbox_inches='tight')
-    plt.savefig(f'{os.path.join(outdir, outname)}venn.svg', dpi=200, bbox_inches='tight')
-    with open(f'{os.path.join(outdir, outname)}venn.html', "w") as fo_tmp:
-        fo_tmp.write(
-            '<embed src="'+f'{outname}venn.svg'+'" type="image/svg+xml" />')
+    with stage("draw"):
+        template = get_figure_template(ax, "venn", n_sets, colors, figsize, reuse_figure)
+        ax = template.ax
+        if template.fresh:
+            shape_params = zip(
+                SHAPE_COORDS[n_sets], SHAPE_DIMS[n_sets], SHAPE_ANGLES[n_sets], colors
+            )
+            for coords, dims, angle, color in shape_params:
+                draw_shape(ax, *coords, *dims, angle, color)
+            template.fresh = False
+        template.begin()
+        for logic, petal_label in petal_labels.items():
+            # some petals could have been modified manually:
+            if logic in PETAL_LABEL_COORDS[n_sets]:
+                x, y = PETAL_LABEL_COORDS[n_sets][logic]
+                template.text(logic, x, y, petal_label, fontsize=fontsize, filename=names_out and link_prefix+names_out[logic])
+        if legend_loc is not None:
+            # dataset_labels = {r"Hyperlink: \url{http://google.com}"}
+            # ax.legend(dataset_labels, loc=legend_loc, prop={"size": fontsize})
+            # print(dataset_labels, legend_loc)
+            if (dataset_sizes is None) and (petal_counts is not None):
+                dataset_sizes = compute_dataset_sizes(petal_counts)
+            elif dataset_sizes is None:
+                dataset_sizes = [len(x) for x in data.values()]
+            for a, i, x, l, c in zip("ABCDEF", range(len(dataset_labels)), dataset_labels, dataset_sizes, colors):
+                annoloc1 = (0.96, 1-i*0.05)
+                annoloc2 = (1, 1-i*0.05)
+                # print(colors)
+                url_name = names_out and link_prefix+outname+"set.%s.%s.txt" % (a, x)
+                template.annotate(("legend", i, 1), "   ", annoloc1,
+                                  url=url_name,
+                                  bbox=dict(color=c, alpha=.4, url=url_name))
+                template.annotate(("legend", i, 2), "%s(%s)" % (x, l), annoloc2,
+                                  url=url_name,
+                                  bbox=dict(color="w", alpha=.4, url=url_name))
+        template.end()
+    save_figure(ax.figure, outdir, outname, formats=formats, workers=export_workers)
     return ax, outname
 
 def update_hidden(hidden, logic, petal_labels):
@@ -182,102 +296,169 @@ def update_hidden(hidden, logic, petal_labels):
             hidden[i] += int(petal_labels[logic])
     return hidden
 
-def draw_hint_explanation(ax, dataset_labels, fontsize):
+def draw_hint_explanation(template, dataset_labels, fontsize):
     """Add explanation of 'n/d*' hints"""
     example_labels = list(dataset_labels)[0], list(dataset_labels)[3]
     hint_text = (
         "* elements of set in intersections that are not displayed,\n" +
         "such as shared only between {} and {}".format(*example_labels)
     )
-    draw_text(ax, .5, -.1, hint_text, fontsize)
+    template.text("hint", .5, -.1, hint_text, fontsize)
 
-def draw_pseudovenn6(*, petal_labels, dataset_labels, hint_hidden, colors, figsize, fontsize, legend_loc, ax, names_out, outname, data, outdir):
+def draw_pseudovenn6(*, petal_labels, dataset_labels, hint_hidden, colors, figsize, fontsize, legend_loc, ax, names_out, outname, data, outdir, dataset_sizes=None, formats=FIGURE_FORMATS, export_workers=1, reuse_figure=False, link_prefix="", petal_counts=None):
     """Draw intersection of 6 circles (does not include some combinations), annotate petals and dataset labels"""
     n_sets = get_n_sets(petal_labels, dataset_labels)
     if n_sets != 6:
         raise NotImplementedError("Pseudovenn implemented only for 6 sets")
-    ax = init_axes(ax, figsize)
-    for step, color in zip(range(6), colors):
-        angle = (2 - step) * pi / 3
-        x = .5 + .2 * cos(angle)
-        y = .5 + .2 * sin(angle)
-        draw_ellipse(ax, x, y, .6, .6, 0, color)
-    if hint_hidden:
-        hidden = [0] * n_sets
-    for logic, petal_label in petal_labels.items():
-        # not all theoretical intersections are shown, and petals could have been modified manually:
-        if logic in PSEUDOVENN_PETAL_COORDS[6]:
-            x, y = PSEUDOVENN_PETAL_COORDS[6][logic]
-            draw_text(ax, x, y, petal_label, fontsize, filename=names_out[logic])
+    with stage("draw"):
+        template = get_figure_template(ax, "pseudovenn6", n_sets, colors, figsize, reuse_figure)
+        ax = template.ax
+        if template.fresh:
+            for step, color in zip(range(6), colors):
+                angle = (2 - step) * pi / 3
+                x = .5 + .2 * cos(angle)
+                y = .5 + .2 * sin(angle)
+                draw_ellipse(ax, x, y, .6, .6, 0, color)
+            template.fresh = False
+        template.begin()
+        if hint_hidden and (petal_counts is not None):
+            hidden = compute_hidden_counts(petal_counts)
         elif hint_hidden:
-            hidden = update_hidden(hidden, logic, petal_labels)
-    if hint_hidden:
-        for step, hidden_value in zip(range(6), hidden):
-            angle = (2 - step) * pi / 3
-            x = .5 + .57 * cos(angle)
-            y = .5 + .57 * sin(angle)
-            draw_text(ax, x, y, "{}\n n/d*".format(hidden_value), fontsize)
-        ax.set(xlim=(-.2, 1.05))
-        draw_hint_explanation(ax, dataset_labels, fontsize)
-    if legend_loc is not None:
-        # dataset_labels = {r"Hyperlink: \url{http://google.com}"}
-        # ax.legend(dataset_labels, loc=legend_loc, prop={"size": fontsize})
-        # print(dataset_labels, legend_loc)
-        for a, i, x, l, c in zip("ABCDEF", range(len(dataset_labels)), dataset_labels, [len(x) for x in data.values()], colors):
-            annoloc1 = (0.9, 1-i*0.05)
-            annoloc2 = (0.94, 1-i*0.05)
-            # print(colors)
-            url_name = outname+"set.%s.%s.txt" % (a, x)
-            ax.annotate("   ", xy=annoloc1,
-                        xytext=annoloc1,
-                        url=url_name,
-                        bbox=dict(color=c, alpha=.4, url=url_name))
-            ax.annotate("%s(%s)" % (x, l), xy=annoloc2,
-                        xytext=annoloc2,
-                        url=url_name,
-                        bbox=dict(color="w", alpha=.4, url=url_name))
-    plt.savefig(f'{os.path.join(outdir, outname)}venn.pdf', dpi=200, bbox_inches='tight')
-    plt.savefig(f'{os.path.join(outdir, outname)}venn.png', dpi=200, bbox_inches='tight')
-    plt.savefig(f'{os.path.join(outdir, outname)}venn.svg', dpi=200, bbox_inches='tight')
-    plt.savefig(f'{os.path.join(outdir, outname)}venn.html', dpi=200, bbox_inches='tight')
+            # without numeric counts, hidden totals are parsed back from labels (only works for fmt="{size}"):
+            hidden = [0] * n_sets
+        for logic, petal_label in petal_labels.items():
+            # not all theoretical intersections are shown, and petals could have been modified manually:
+            if logic in PSEUDOVENN_PETAL_COORDS[6]:
+                x, y = PSEUDOVENN_PETAL_COORDS[6][logic]
+                template.text(logic, x, y, petal_label, fontsize, filename=names_out and link_prefix+names_out[logic])
+            elif hint_hidden and (petal_counts is None):
+                hidden = update_hidden(hidden, logic, petal_labels)
+        if hint_hidden:
+            for step, hidden_value in zip(range(6), hidden):
+                angle = (2 - step) * pi / 3
+                x = .5 + .57 * cos(angle)
+                y = .5 + .57 * sin(angle)
+                template.text(("hidden", step), x, y, "{}\n n/d*".format(hidden_value), fontsize)
+            ax.set(xlim=(-.2, 1.05))
+            draw_hint_explanation(template, dataset_labels, fontsize)
+        else:
+            ax.set(xlim=(-.05, 1.05))
+        if legend_loc is not None:
+            # dataset_labels = {r"Hyperlink: \url{http://google.com}"}
+            # ax.legend(dataset_labels, loc=legend_loc, prop={"size": fontsize})
+            # print(dataset_labels, legend_loc)
+            if (dataset_sizes is None) and (petal_counts is not None):
+                dataset_sizes = compute_dataset_sizes(petal_counts)
+            elif dataset_sizes is None:
+                dataset_sizes = [len(x) for x in data.values()]
+            for a, i, x, l, c in zip("ABCDEF", range(len(dataset_labels)), dataset_labels, dataset_sizes, colors):
+                annoloc1 = (0.9, 1-i*0.05)
+                annoloc2 = (0.94, 1-i*0.05)
+                # print(colors)
+                url_name = names_out and link_prefix+outname+"set.%s.%s.txt" % (a, x)
+                template.annotate(("legend", i, 1), "   ", annoloc1,
+                                  url=url_name,
+                                  bbox=dict(color=c, alpha=.4, url=url_name))
+                template.annotate(("legend", i, 2), "%s(%s)" % (x, l), annoloc2,
+                                  url=url_name,
+                                  bbox=dict(color="w", alpha=.4, url=url_name))
+        template.end()
+    save_figure(ax.figure, outdir, outname, formats=formats, workers=export_workers)
     return ax, outname
 
-def is_valid_dataset_dict(data):
-    """Validate passed data (must be dictionary of sets)"""
-    if not (hasattr(data, "keys") and hasattr(data, "values")):
-        return False
-    for dataset in data.values():
-        if not isinstance(dataset, set):
-            return False
-    else:
-        return True
-
-def venn_dispatch(data, func, fmt="{size}", hint_hidden=False, cmap="viridis", alpha=.4, figsize=(8, 8), fontsize=13, legend_loc="upper right", ax=None, names_out=None, outdir="."):
-    """Check input, generate petal labels, draw venn or pseudovenn diagram"""
+@profiled
+def venn_dispatch(data, func, fmt="{size}", hint_hidden=False, cmap="viridis", alpha=.4, figsize=(8, 8), fontsize=13, legend_loc="upper right", ax=None, names_out=None, outdir=".", engine="auto", counts_only=False, lazy=False, formats=FIGURE_FORMATS, export_workers=1, reuse_figure=False, cache=None, output="files", sort_output=True, workers=1):
+    """Check input, generate petal labels, draw venn or pseudovenn diagram; pass profile=True to also get per-stage stats"""
     os.makedirs(outdir, exist_ok=True)
-    if not is_valid_dataset_dict(data):
-        raise TypeError("Only dictionaries of sets are understood")
-    if hint_hidden and (func == draw_pseudovenn6) and (fmt != "{size}"):
-        error_message = "To use fmt='{}', set hint_hidden=False".format(fmt)
-        raise NotImplementedError(error_message)
-    n_sets = len(data)
+    if isinstance(data, VennResult):
+        # already partitioned (e.g. by `venn_batch()`), only drawn here:
+        if not lazy:
+            raise ValueError("A VennResult can only be drawn with lazy=True")
+        engine, dataset_labels = "python", data.dataset_labels
+    elif not is_valid_dataset_dict(data):
+        raise TypeError("Only dictionaries of sets or arrays are understood")
+    else:
+        engine, dataset_labels = resolve_engine(data.values(), engine), list(data.keys())
+    if engine == "sketch":
+        # sketches only estimate petal sizes:
+        if lazy:
+            raise ValueError("Sketched datasets cannot be used with lazy=True")
+        counts_only = True
+    n_sets = len(dataset_labels)
     # outname = '__vs__'.join(
     #     map(lambda x: x[0]+"."+x[1], zip("ABCDEF", data.keys()))
     # ) + "___"
     outname = "result_"
-    petal_labels, names_out = generate_petal_labels(data.values(), fmt=fmt, outname=outname, outdir=outdir)
-    # print("data:", data)
-    # print(names_out)
-    for a, x in zip("ABCDEF", data):
-        print(*sorted(data[x]), sep="\n", file=open(
-            os.path.join(outdir, outname+"set.%s.%s.txt" % (a, x)), "w"))
-    return func(
+    if counts_only and lazy:
+        raise ValueError("counts_only and lazy are mutually exclusive")
+    if output not in OUTPUT_KINDS:
+        raise ValueError("output must be one of " + ", ".join(OUTPUT_KINDS))
+    if cache is not None:
+        if lazy or (ax is not None):
+            raise ValueError("cache cannot be combined with lazy=True or with passed ax")
+        if not isinstance(cache, ResultCache):
+            cache = ResultCache(cache)
+        cache_key = get_cache_key(
+            data, func=func.__name__, fmt=fmt, hint_hidden=hint_hidden,
+            cmap=cmap, alpha=alpha, figsize=tuple(figsize), fontsize=fontsize,
+            legend_loc=legend_loc, counts_only=counts_only, formats=tuple(formats),
+            output=output, sort_output=sort_output, engine=engine,
+        )
+        with stage("cache_lookup"):
+            cache_hit = cache.get(cache_key, outdir)
+        if cache_hit:
+            return None, outname
+    if lazy:
+        if isinstance(data, VennResult):
+            result = data
+        else:
+            with stage("partition"):
+                result = VennResult.from_datasets(data, engine=engine, outname=outname)
+        petal_labels, names_out = result.petal_labels(fmt=fmt), result.names_out()
+        petal_counts = result.petal_counts
+        dataset_sizes = result.dataset_sizes
+    elif counts_only:
+        with stage("partition"):
+            petal_counts = compute_petal_counts(data.values(), engine=engine, workers=workers)
+        petal_labels = format_petal_labels(petal_counts, fmt=fmt)
+        names_out, dataset_sizes = None, compute_dataset_sizes(petal_counts)
+    else:
+        if engine == "numpy":
+            from ._vectorized import as_array
+            from numpy import unique
+            data = {name: unique(as_array(dataset)) for name, dataset in data.items()}
+        with open_output(outdir, outname, output) as petal_output:
+            petal_counts, names_out = write_petal_files(data.values(), outname=outname, outdir=outdir, engine=engine, output=petal_output, sort_output=sort_output, workers=workers)
+            petal_labels = format_petal_labels(petal_counts, fmt=fmt)
+            # print("data:", data)
+            # print(names_out)
+            with stage("write_sets"):
+                for a, x in zip("ABCDEF", data):
+                    petal_output.write(outname+"set.%s.%s.txt" % (a, x), data[x], sort_output=sort_output, end="\n")
+        dataset_sizes = [len(x) for x in data.values()]
+    ax, outname = func(
         names_out=names_out, outname=outname, outdir=outdir,
-        petal_labels=petal_labels, data=data,
-        dataset_labels=data.keys(), hint_hidden=hint_hidden,
+        petal_labels=petal_labels, data=data, dataset_sizes=dataset_sizes,
+        dataset_labels=dataset_labels, hint_hidden=hint_hidden,
         colors=generate_colors(n_colors=n_sets, cmap=cmap, alpha=alpha),
-        figsize=figsize, fontsize=fontsize, legend_loc=legend_loc, ax=ax
+        figsize=figsize, fontsize=fontsize, legend_loc=legend_loc, ax=ax,
+        formats=formats, export_workers=export_workers, reuse_figure=reuse_figure,
+        link_prefix=get_link_prefix(output, outname), petal_counts=petal_counts,
     )
+    if cache is not None:
+        filenames = [f"{outname}venn.{fmt}" for fmt in get_figure_formats(formats)]
+        if names_out and (output == "bundle"):
+            filenames += [get_bundle_name(outname), get_bundle_index_name(outname)]
+        elif names_out:
+            filenames += list(names_out.values())
+            filenames += [outname+"set.%s.%s.txt" % (a, x) for a, x in zip("ABCDEF", data)]
+        with stage("cache_store"):
+            cache.put(cache_key, outdir, filenames)
+    if lazy:
+        result.ax = ax
+        return result
+    else:
+        return ax, outname
 
 venn = partial(venn_dispatch, func=draw_venn, hint_hidden=False)
 pseudovenn = partial(venn_dispatch, func=draw_pseudovenn6, hint_hidden=True)